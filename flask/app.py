@@ -1,107 +1,923 @@
-from flask import Flask, render_template, request, redirect, url_for, flash
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, abort, Response, session
+import io
 import json
 import subprocess
+import sys
 import os
+import tempfile
+import uuid
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+
+from cache import ResultCache, workload_key
+from gantt import render_columns_svg, render_lanes_png, render_lanes_svg, render_png, render_svg
+from jobs import JobQueue, QueueFull, process_context
+from metrics import Registry, Stopwatch, size_label
+from uploads import parse_upload
+from scheduler import (ALGORITHMS, CPU_QUEUES, PRIORITY_ALGORITHMS, check_workload, iter_events, resimulate, simulate,
+                       simulate_stats, summarize, sweep_quanta)
+from tracefile import write_trace
+from visualizer_pool import VisualizerPool
 
 app = Flask(__name__)
 app.secret_key = 'supersecretkey'
+# Bound on the request body, and with it on uploaded workload files
+app.config['MAX_CONTENT_LENGTH'] = 64 * 1024 * 1024
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Optional live views, one pygame script per algorithm
+VISUALIZERS = {
+    'FCFS': 'fcfs_visualizer.py',
+    'SJF': 'sjf_visualizer.py',
+    'Priority': 'p_visualizer.py',
+    'Round Robin': 'rr_visualizer.py',
+    'SRTF': 'sjf_visualizer.py',
+    'Preemptive Priority': 'p_visualizer.py',
+    'MLFQ': 'rr_visualizer.py',
+}
+
+# Warm processes for the live views: how many, seconds a finished view stays
+# open and seconds after which any view is closed
+VISUALIZER_WORKERS = 2
+VISUALIZER_LINGER = 10
+VISUALIZER_TIMEOUT = 300
+
+# Worker pool for /compare and /sweep, created on first use
+_process_pool = None
+_process_pool_lock = threading.Lock()
+POOL_WORKERS = max(os.cpu_count() or 1, len(ALGORITHMS))
+# Comparisons and sweeps that may occupy the pool at once, and seconds a
+# request waits for one before giving up
+POOL_MAX_ACTIVE = 4
+POOL_TIMEOUT = 60
+pool_slots = threading.BoundedSemaphore(POOL_MAX_ACTIVE)
+
+# Limits for submitted simulations: concurrent workers, waiting jobs and
+# seconds a job may run before it is stopped
+JOB_WORKERS = 4
+JOB_MAX_PENDING = 64
+JOB_TIMEOUT = 60
+# SQLite file through which the server processes of one host (e.g. gunicorn
+# workers) share job status and results
+JOB_STORE_PATH = os.environ.get('SCHEDULER_JOB_STORE') or os.path.join(tempfile.gettempdir(), 'scheduler-jobs.sqlite3')
+# Directory where running jobs spool their events for /jobs/<id>/events, and
+# seconds a stream waits before looking for new events
+EVENT_SPOOL_DIR = os.environ.get('SCHEDULER_EVENT_DIR') or os.path.join(tempfile.gettempdir(), 'scheduler-events')
+EVENT_POLL_INTERVAL = 0.1
+# Events a job spools at most; the live chart stops there and the results
+# page shows the whole schedule
+MAX_SPOOLED_EVENTS = 100000
+
+# Finished results kept in memory, by count and by bytes of JSON, plus an
+# optional SQLite file that keeps them across restarts. A result over the
+# byte budget on its own is only kept in the file.
+RESULT_CACHE_SIZE = 256
+RESULT_CACHE_BYTES = 64 * 1024 * 1024
+RESULT_CACHE_PATH = os.environ.get('SCHEDULER_CACHE_PATH')
+# Checkpointed snapshots of recent single-CPU runs, which an edited
+# resubmission of the same workload resumes from
+SNAPSHOT_STORE_SIZE = 8
+
+# Processes accepted from one uploaded workload file
+MAX_UPLOAD_ROWS = 1_000_000
+
+# Largest CPU count a simulation may ask for
+MAX_CPUS = 1024
+# Most MLFQ levels a simulation may ask for
+MAX_MLFQ_LEVELS = 64
+# Most time quanta one sweep may evaluate
+MAX_SWEEP_QUANTA = 1000
+
+# Served on /metrics. Stages of a simulation request are parse, cache_lookup,
+# queue_wait, simulate, job_details, render_chart, render_page and
+# visualizer_spawn, labelled by algorithm and workload size.
+metrics = Registry()
+stage_seconds = metrics.histogram(
+    'scheduler_stage_seconds', "Seconds spent in each stage of a simulation request.",
+    ('stage', 'algorithm', 'size'),
+)
+requests_in_flight = metrics.gauge('scheduler_requests_in_flight', "Requests being handled.")
+jobs_gauge = metrics.gauge('scheduler_jobs', "Simulation jobs waiting or running.", ('state',))
+cache_gauge = metrics.gauge('scheduler_result_cache', "Result cache counters and size.", ('counter',))
+
+
+def parse_workload(form, algorithm=None, files=None):
+    """Parse the workload fields of the index form into a dictionary.
+
+    With an ``algorithm`` only the extra fields it needs are read and they
+    are required (MLFQ's ``boost_interval`` stays optional); without one
+    (compare mode) the time quantum, priorities and MLFQ quanta are read
+    whenever they were filled in. A ``workload_file`` among ``files``
+    replaces the process, burst, arrival and priority fields. ``cpus`` and
+    ``cpu_queue`` are only kept for more than one CPU. Raises ``ValueError``
+    with a message meant for the user.
+    """
+    upload = files.get('workload_file') if files else None
+    if upload and upload.filename:
+        data = parse_upload(upload.stream, upload.filename, max_rows=MAX_UPLOAD_ROWS)
+        if algorithm in PRIORITY_ALGORITHMS and 'priorities' not in data:
+            raise ValueError("Priorities are required for Priority scheduling.")
+        if algorithm is not None and algorithm not in PRIORITY_ALGORITHMS:
+            data.pop('priorities', None)
+    else:
+        data = _parse_workload_fields(form, algorithm)
+
+    if algorithm == 'Round Robin' or (algorithm is None and form.get('time_quantum')):
+        try:
+            time_quantum = int(form.get('time_quantum', ''))
+        except ValueError:
+            time_quantum = 0
+        if time_quantum <= 0:
+            raise ValueError("Time quantum must be a positive integer.")
+        data['time_quantum'] = time_quantum
+
+    if algorithm == 'MLFQ' or (algorithm is None and form.get('quanta')):
+        try:
+            quanta = list(map(int, form.get('quanta', '').split(',')))
+        except ValueError:
+            raise ValueError("MLFQ quanta must be comma-separated integers, one per level.")
+        if min(quanta) <= 0:
+            raise ValueError("MLFQ quanta must be positive integers.")
+        if len(quanta) > MAX_MLFQ_LEVELS:
+            raise ValueError(f"MLFQ supports at most {MAX_MLFQ_LEVELS} levels.")
+        data['quanta'] = quanta
+        if form.get('boost_interval'):
+            try:
+                boost_interval = int(form['boost_interval'])
+            except ValueError:
+                boost_interval = 0
+            if boost_interval <= 0:
+                raise ValueError("The boost interval must be a positive integer.")
+            data['boost_interval'] = boost_interval
+
+    # One CPU is the default and is left out, so single-CPU workloads look as before
+    try:
+        cpus = int(form.get('cpus') or 1)
+    except ValueError:
+        cpus = 0
+    if cpus <= 0 or cpus > MAX_CPUS:
+        raise ValueError(f"The number of CPUs must be an integer from 1 to {MAX_CPUS}.")
+    if cpus > 1:
+        cpu_queue = form.get('cpu_queue') or 'shared'
+        if cpu_queue not in CPU_QUEUES:
+            raise ValueError(f"Unknown ready queue layout {cpu_queue}.")
+        if algorithm == 'MLFQ':
+            raise ValueError("MLFQ runs on a single CPU.")
+        data['cpus'] = cpus
+        data['cpu_queue'] = cpu_queue
+
+    return data
+
+
+def _parse_workload_fields(form, algorithm):
+    # The comma-separated text fields of the index form
+    try:
+        processes = [p.strip() for p in form['process'].split(',')]
+        burst_times = list(map(int, form['burst_time'].split(',')))
+        arrival_times = list(map(int, form['arrival_time'].split(',')))
+    except ValueError:
+        raise ValueError("Burst and arrival times must be comma-separated integers.")
+    if len(processes) != len(burst_times) or len(processes) != len(arrival_times):
+        raise ValueError("The number of processes, burst times, and arrival times must match.")
+
+    data = {
+        'processes': processes,
+        'burst_times': burst_times,
+        'arrival_times': arrival_times,
+    }
+
+    if algorithm in PRIORITY_ALGORITHMS or (algorithm is None and form.get('priority')):
+        if not form.get('priority'):
+            raise ValueError("Priorities are required for Priority scheduling.")
+        try:
+            priorities = list(map(int, form['priority'].split(',')))
+        except ValueError:
+            raise ValueError("Priorities must be comma-separated integers.")
+        if len(priorities) != len(processes):
+            raise ValueError("Number of priorities must match number of processes.")
+        data['priorities'] = priorities
+
+    return data
+
+
+def run_simulation(data, checkpoints=False, tap=None):
+    """Schedule a parsed workload in-process and return the result dictionary.
+
+    A ``base`` snapshot in ``data`` resumes the run from an earlier one (see
+    ``scheduler.resimulate()``). ``checkpoints`` asks a single-CPU run for a
+    snapshot of its own under ``'snapshot'``. ``tap`` is passed on to the
+    scheduler.
+    """
+    if 'base' in data:
+        return resimulate(data['base'], data['processes'], data['burst_times'], data['arrival_times'],
+                          priorities=data.get('priorities'), tap=tap)
+    return simulate(
+        data['processes'],
+        data['burst_times'],
+        data['arrival_times'],
+        data['algorithm'],
+        time_quantum=data.get('time_quantum'),
+        priorities=data.get('priorities'),
+        cpus=data.get('cpus', 1),
+        queue=data.get('cpu_queue', 'shared'),
+        checkpoints=checkpoints and 'cpus' not in data,
+        quanta=data.get('quanta'),
+        boost_interval=data.get('boost_interval'),
+        tap=tap,
+    )
+
+
+def build_job_details(result):
+    """Build the results table rows and averages for ``results.html``."""
+    table = result['table']
+    stats = summarize(table.burst, table.arrival, table.finish)
+    job_details = list(zip(
+        table.names,
+        table.arrival.tolist(),
+        table.burst.tolist(),
+        stats['finish'].tolist(),
+        stats['turnaround'].tolist(),
+        stats['waiting'].tolist(),
+    ))
+    return job_details, stats['avg_turnaround'], stats['avg_waiting']
+
+
+def simulate_job(data):
+    """Background job body: simulate ``data`` and return the ``results.html`` context.
+
+    The seconds spent per stage come back under ``stage_seconds``, and a
+    single-CPU run's snapshot under ``snapshot``; a run resumed from a
+    ``base`` also has ``resumed_at``. When ``data`` asks for a profile the
+    job runs under cProfile and the context also carries ``profile`` (the
+    ``.prof`` bytes) and ``profile_summary``. With an ``events_path`` the
+    schedule is spooled there while it is computed (see ``spool_events()``).
+    """
+    if data.get('profile'):
+        # cProfile and pstats are only loaded once a run asks for a profile
+        from profiling import profile_call
+        context, prof, summary = profile_call(_simulate_job, data)
+        context['profile'] = prof
+        context['profile_summary'] = summary
+        return context
+    return _simulate_job(data)
+
+
+def _simulate_job(data):
+    watch = Stopwatch()
+    path = data.get('events_path')
+    tap = spool_events(path, data.get('cpus', 1)) if path else None
+    try:
+        with watch.stage('simulate'):
+            result = run_simulation(data, checkpoints=True, tap=tap)
+    finally:
+        # Streams that already opened the spool read it to the end
+        if path:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+    with watch.stage('job_details'):
+        job_details, avg_turnaround_time, avg_waiting_time = build_job_details(result)
+    with watch.stage('render_chart'):
+        if 'cpu_lanes' in result:
+            gantt_svg = render_lanes_svg(result['cpu_lanes'])
+        elif 'snapshot' in result:
+            # The snapshot has the whole chart as columns, a resumed run's too
+            snapshot = result['snapshot']
+            gantt_svg = render_columns_svg(snapshot.names, *snapshot.segments())
+        else:
+            gantt_svg = render_svg(result['gantt_chart'])
+    context = {
+        'algorithm': data['algorithm'],
+        'job_details': job_details,
+        'avg_turnaround_time': avg_turnaround_time,
+        'avg_waiting_time': avg_waiting_time,
+        'gantt_svg': gantt_svg,
+        'stage_seconds': watch.seconds,
+    }
+    if 'cpu_lanes' in result:
+        context['cpu_utilization'] = result['utilization']
+    if 'snapshot' in result:
+        context['snapshot'] = result['snapshot']
+    if result.get('resumed_at'):
+        context['resumed_at'] = result['resumed_at']
+    return context
+
+
+def spool_events(path, cpus=1):
+    """Return a ``tap`` for the scheduler that copies the schedule to ``path``.
+
+    Dispatches, preemptions and completions are written as the Server-Sent
+    Events of ``/stream`` for ``/jobs/<id>/events`` to pass on while the job
+    runs; arrivals are left out. After ``MAX_SPOOLED_EVENTS`` a ``truncated``
+    event ends the spool and the rest of the run goes through untouched.
+    """
+    def tap(events):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        names = {}
+        left = MAX_SPOOLED_EVENTS
+        with open(path, 'w', encoding='utf-8') as spool:
+            write = spool.write
+            for event in events:
+                if event[1] != 'arrive':
+                    if not left:
+                        write('event: truncated\ndata: {}\n\n')
+                        yield event
+                        break
+                    left -= 1
+                    process = event[2]
+                    name = names.get(process)
+                    if name is None:
+                        name = names[process] = json.dumps(process)
+                    cpu = f', "cpu": {event[3]}' if cpus > 1 else ''
+                    write(f'event: {event[1]}\ndata: {{"time": {event[0]}, "process": {name}{cpu}}}\n\n')
+                yield event
+        yield from events
+    return tap
+
+
+def event_spool_path(job_id):
+    return os.path.join(EVENT_SPOOL_DIR, f'{job_id}.events')
+
+
+def submit_simulation(job_data, stream=False):
+    """Queue ``job_data`` and return the job id.
+
+    With ``stream`` the job spools its events for ``/jobs/<id>/events``, for
+    the status page or a client that asked for it; other jobs do not pay for
+    writing them.
+    """
+    if not stream:
+        return jobs.submit(job_data)
+    # Jobs that were killed leave their spool behind; a spool untouched for
+    # longer than any job may run belongs to a finished job
+    cutoff = time.time() - 2 * JOB_TIMEOUT
+    try:
+        with os.scandir(EVENT_SPOOL_DIR) as entries:
+            for entry in entries:
+                if entry.name.endswith('.events') and entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+    except FileNotFoundError:
+        pass
+    job_id = uuid.uuid4().hex
+    return jobs.submit(dict(job_data, events_path=event_spool_path(job_id)), job_id=job_id)
+
+
+def observe_stage(stage, seconds, algorithm, n):
+    stage_seconds.observe(seconds, stage=stage, algorithm=algorithm, size=size_label(n))
+
+
+def job_done(job):
+    """Record the stage timings of a finished job and cache its result.
+
+    A profile is moved to the job's attachment, which the job store keeps
+    for every server process, and a snapshot to ``snapshots`` under the
+    workload key. The cached result leaves out the
+    profile summary and the resume point, which belong to this run only.
+    """
+    data = job.data
+    result = job.result
+    key = workload_key(data)
+    observe_stage('queue_wait', job.started - job.submitted, data['algorithm'], len(data['processes']))
+    stages = result.pop('stage_seconds', {})
+    snapshot = result.pop('snapshot', None)
+    if snapshot is not None:
+        snapshots.put(key, snapshot)
+    shared = {name: value for name, value in result.items() if name not in ('profile_summary', 'resumed_at')}
+    if 'profile' in result:
+        # Profiler overhead would skew the stage histograms
+        job.attachment = result.pop('profile')
+        del shared['profile']
+        result_cache.put(key, shared)
+        return
+    for stage, seconds in stages.items():
+        observe_stage(stage, seconds, data['algorithm'], len(data['processes']))
+    result_cache.put(key, shared)
+
+
+result_cache = ResultCache(RESULT_CACHE_SIZE, RESULT_CACHE_PATH, max_bytes=RESULT_CACHE_BYTES)
+snapshots = ResultCache(SNAPSHOT_STORE_SIZE)
+jobs = JobQueue(simulate_job, workers=JOB_WORKERS, max_pending=JOB_MAX_PENDING, timeout=JOB_TIMEOUT,
+                on_done=job_done, path=JOB_STORE_PATH)
+visualizers = VisualizerPool(VISUALIZER_WORKERS, linger=VISUALIZER_LINGER, timeout=VISUALIZER_TIMEOUT)
+
+
+def launch_visualizer(data):
+    """Start the pygame view for ``data`` without waiting for the window to close.
+
+    The view runs on a warm ``visualizers`` worker when one is idle, and in a
+    new process otherwise. Either way the workload goes over a pipe and the
+    output is discarded, so concurrent requests never share a file on disk.
+    Returns the new process, or None when a warm worker took the view.
+    """
+    script = os.path.join(APP_DIR, VISUALIZERS[data['algorithm']])
+    if visualizers.show(script, data):
+        return None
+    proc = subprocess.Popen(
+        [sys.executable, VISUALIZERS[data['algorithm']], '-', '-'],
+        cwd=APP_DIR,
+        env=dict(os.environ, VIEW_LINGER=str(VISUALIZER_LINGER), VIEW_TIMEOUT=str(VISUALIZER_TIMEOUT)),
+        stdin=subprocess.PIPE,
+        stdout=subprocess.DEVNULL,
+    )
+    with proc.stdin:
+        proc.stdin.write(json.dumps(data, default=list).encode())
+    return proc
+
+
+def get_process_pool():
+    """Return the process pool that runs comparisons and quantum sweeps."""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(max_workers=POOL_WORKERS, mp_context=process_context)
+        return _process_pool
+
+
+def take_pool_slot():
+    """Reserve one of the ``POOL_MAX_ACTIVE`` pool slots, or raise ``QueueFull``."""
+    if not pool_slots.acquire(blocking=False):
+        raise QueueFull(f"{POOL_MAX_ACTIVE} comparisons or sweeps are already running; try again later.")
+
+
+def release_when_done(futures, semaphore):
+    """Release ``semaphore`` once every one of ``futures`` has finished or been cancelled."""
+    pending = [len(futures)]
+    lock = threading.Lock()
+
+    def done(_):
+        with lock:
+            pending[0] -= 1
+            last = not pending[0]
+        if last:
+            semaphore.release()
+
+    for future in futures:
+        future.add_done_callback(done)
+
+
+def compare_policies(data):
+    """Run every policy that ``data`` has the inputs for, concurrently.
+
+    The Priority policies are skipped without priorities, Round Robin
+    without a time quantum and MLFQ without quanta or on more than one CPU.
+    Returns ``(algorithm, stats)`` pairs in ``ALGORITHMS`` order,
+    where ``stats`` is a ``schedule_stats()`` dictionary.
+
+    The comparison takes a pool slot (see ``take_pool_slot()``) and raises
+    ``TimeoutError`` when the results take longer than ``POOL_TIMEOUT``
+    seconds.
+    """
+    algorithms = [
+        algorithm for algorithm in ALGORITHMS
+        if (algorithm not in PRIORITY_ALGORITHMS or 'priorities' in data)
+        and (algorithm != 'Round Robin' or 'time_quantum' in data)
+        and (algorithm != 'MLFQ' or ('quanta' in data and 'cpus' not in data))
+    ]
+    pool = get_process_pool()
+    take_pool_slot()
+    futures = []
+    try:
+        futures = [
+            pool.submit(
+                simulate_stats,
+                data['processes'],
+                data['burst_times'],
+                data['arrival_times'],
+                algorithm,
+                time_quantum=data.get('time_quantum'),
+                priorities=data.get('priorities'),
+                cpus=data.get('cpus', 1),
+                queue=data.get('cpu_queue', 'shared'),
+                quanta=data.get('quanta'),
+                boost_interval=data.get('boost_interval'),
+            )
+            for algorithm in algorithms
+        ]
+    finally:
+        # A slot stays taken until the pool has finished the comparison's work
+        if futures:
+            release_when_done(futures, pool_slots)
+        else:
+            pool_slots.release()
+
+    deadline = time.monotonic() + POOL_TIMEOUT
+    try:
+        return [(algorithm, future.result(timeout=max(deadline - time.monotonic(), 0)))
+                for algorithm, future in zip(algorithms, futures)]
+    except FutureTimeout:
+        for future in futures:
+            future.cancel()
+        raise TimeoutError(f"The comparison did not finish within {POOL_TIMEOUT} seconds.")
+
+
+def parse_submission(form, files=None):
+    """Parse an index-form submission, including its algorithm, or raise ``ValueError``.
+
+    The workload is checked as the scheduler will check it, so an invalid
+    one is turned away here instead of failing once it has been queued.
+    """
+    algorithm = form['algorithm']
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"Unknown algorithm {algorithm}.")
+    data = parse_workload(form, algorithm, files)
+    data['algorithm'] = algorithm
+    check_workload(data['processes'], data['burst_times'], data['arrival_times'], algorithm, data.get('time_quantum'),
+                   data.get('priorities'), data.get('cpus', 1), data.get('cpu_queue', 'shared'), data.get('quanta'),
+                   data.get('boost_interval'))
+    return data
+
+
+def lookup_submission(form, files=None, profile=False):
+    """Parse a submission and look it up in the result cache, timing both stages.
+
+    Returns ``(data, cached)`` with ``cached`` set to ``None`` on a miss. A
+    ``profile`` request is marked in ``data`` and always misses, since the
+    point is to watch the simulation run.
+    """
+    start = time.perf_counter()
+    data = parse_submission(form, files)
+    parsed = time.perf_counter()
+    if profile:
+        data['profile'] = True
+        cached = None
+    else:
+        cached = result_cache.get(workload_key(data))
+    observe_stage('parse', parsed - start, data['algorithm'], len(data['processes']))
+    observe_stage('cache_lookup', time.perf_counter() - parsed, data['algorithm'], len(data['processes']))
+    return data, cached
+
+
+def with_base(data):
+    """Return the job data for ``data`` and remember it as this session's latest run.
+
+    When the session's previous run left a snapshot with the same policy on
+    one CPU, the job data carries it as ``base`` and the edited workload is
+    resumed from it instead of being scheduled from the start.
+    """
+    previous = session.get('last_workload')
+    session['last_workload'] = workload_key(data)
+    base = snapshots.get(previous) if previous else None
+    if (base is None or 'cpus' in data or base.algorithm != data['algorithm']
+            or base.time_quantum != data.get('time_quantum') or base.quanta != data.get('quanta')
+            or base.boost_interval != data.get('boost_interval')):
+        return data
+    return dict(data, base=base)
+
 
 @app.route('/', methods=['GET', 'POST'])
 def index():
     if request.method == 'POST':
-        processes = request.form['process'].split(',')
-        burst_times = list(map(int, request.form['burst_time'].split(',')))
-        arrival_times = list(map(int, request.form['arrival_time'].split(',')))
-        algorithm = request.form['algorithm']
-
-        # Check for time quantum if Round Robin is selected
-        time_quantum = None
-        if algorithm == 'Round Robin':
-            time_quantum = int(request.form['time_quantum'])
-            if time_quantum <= 0:
-                flash("Error: Time quantum must be a positive integer.")
-                return redirect(url_for('index'))
-
-        # Check for priorities if Priority algorithm is selected
-        priorities = None
-        if algorithm == 'Priority':
-            if 'priority' not in request.form or not request.form['priority']:
-                flash("Error: Priorities are required for Priority scheduling.")
-                return redirect(url_for('index'))
-            priorities = list(map(int, request.form['priority'].split(',')))
-            if len(priorities) != len(processes):
-                flash("Error: Number of priorities must match number of processes.")
-                return redirect(url_for('index'))
-
-        # Check if input lists match in length
-        if len(processes) != len(burst_times) or len(processes) != len(arrival_times):
-            flash("Error: The number of processes, burst times, and arrival times must match.")
+        try:
+            # Resubmitted workloads are answered from the cache without a job
+            data, cached = lookup_submission(request.form, request.files, profile=bool(request.values.get('profile')))
+            # An edit of the previous run resumes from its snapshot
+            job_data = with_base(data)
+            if cached is None:
+                # The job page streams the schedule while the job runs
+                job_id = submit_simulation(job_data, stream=True)
+        except (ValueError, QueueFull) as e:
+            flash(f"Error: {e}")
             return redirect(url_for('index'))
 
-        # Prepare data for JSON output
-        data = {
-            'processes': processes,
-            'burst_times': burst_times,
-            'arrival_times': arrival_times,
-            'algorithm': algorithm
-        }
-        if time_quantum:
-            data['time_quantum'] = time_quantum
-        if priorities:
-            data['priorities'] = priorities
-
-        # Save input data to JSON file
-        with open('process_data.json', 'w') as f:
-            json.dump(data, f)
-
-        # Run the appropriate scheduling algorithm script
+        # The live pygame view is optional and runs beside the request
+        if request.form.get('visualize') and 'cpus' in data:
+            flash("The live visualization shows a single CPU; it was not started.")
+        elif request.form.get('visualize'):
+            try:
+                with stage_seconds.time(stage='visualizer_spawn', algorithm=data['algorithm'],
+                                        size=size_label(len(data['processes']))):
+                    launch_visualizer(data)
+            except OSError as e:
+                flash(f"Error: could not start the visualizer: {e}")
+
+        if cached is not None:
+            return render_result(cached)
+        return redirect(url_for('job_page', job_id=job_id))
+
+    return render_template('index.html')
+
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    """Queue a simulation from index-form fields and return its id as JSON.
+
+    A cached workload is answered at once with its result and no job id.
+    With a ``stream`` field the job also spools its schedule, and the reply
+    has the ``events_url`` to follow it on.
+    """
+    try:
+        data, cached = lookup_submission(request.form, request.files, profile=bool(request.values.get('profile')))
+        job_data = with_base(data)
+        if cached is not None:
+            return jsonify(id=None, state='done', result=cached)
+        stream = bool(request.values.get('stream'))
+        job_id = submit_simulation(job_data, stream=stream)
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+    except QueueFull as e:
+        return jsonify(error=str(e)), 503
+    status = {'id': job_id, 'status_url': url_for('job_status', job_id=job_id)}
+    if stream:
+        status['events_url'] = url_for('job_events', job_id=job_id)
+    return jsonify(status), 202
+
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    status = jobs.status(job_id)
+    if status is None:
+        abort(404)
+    if 'profile_summary' in status.get('result', {}):
+        status['profile_url'] = url_for('job_profile', job_id=job_id)
+    return jsonify(status)
+
+
+@app.route('/jobs/<job_id>', methods=['DELETE'])
+def delete_job(job_id):
+    if jobs.status(job_id) is None:
+        abort(404)
+    return jsonify(cancelled=jobs.cancel(job_id))
+
+
+@app.route('/jobs/<job_id>/view')
+def job_page(job_id):
+    """Show the results of a job, or its status and live Gantt chart until it finishes."""
+    status = jobs.status(job_id)
+    if status is None:
+        abort(404)
+    if status['state'] == 'done':
+        profile_url = url_for('job_profile', job_id=job_id) if 'profile_summary' in status['result'] else None
+        return render_result(status['result'], profile_url)
+    if status['state'] in ('queued', 'running'):
+        return render_template('job_status.html', status=status)
+    flash(f"Error: {status.get('error', 'The simulation was ' + status['state'] + '.')}")
+    return redirect(url_for('index'))
+
+
+@app.route('/jobs/<job_id>/events')
+def job_events(job_id):
+    """Stream the schedule of a job as Server-Sent Events while it is computed.
+
+    The events are those of ``/stream`` without arrivals, passed on from the
+    job's spool as its worker writes them. The stream waits while the job is
+    queued and sends ``end`` once the job has finished; a job submitted
+    without streaming only gets the ``end``.
+    """
+    if jobs.status(job_id) is None:
+        abort(404)
+    path = event_spool_path(job_id)
+
+    def generate():
+        spool = None
+        partial = ''
         try:
-            if algorithm == 'FCFS':
-                subprocess.run(['python', 'fcfs.py'], check=True)
-            elif algorithm == 'SJF':
-                subprocess.run(['python', 'sjf_visualizer.py'], check=True)
-            elif algorithm == 'Round Robin':
-                subprocess.run(['python', 'rr_visualizer.py'], check=True)
-            elif algorithm == 'Priority':
-                subprocess.run(['python', 'p_visualizer.py'], check=True)
+            while True:
+                status = jobs.status(job_id)
+                finished = status is None or status['state'] not in ('queued', 'running')
+                if spool is None:
+                    try:
+                        spool = open(path, encoding='utf-8')
+                    except FileNotFoundError:
+                        pass
+                # Pass on complete events only; the worker may be mid-write
+                while spool is not None:
+                    chunk = spool.read(65536)
+                    if not chunk:
+                        break
+                    events, _, partial = (partial + chunk).rpartition('\n\n')
+                    if events:
+                        yield events + '\n\n'
+                if finished:
+                    break
+                time.sleep(EVENT_POLL_INTERVAL)
+        finally:
+            if spool is not None:
+                spool.close()
+        yield "event: end\ndata: {}\n\n"
 
-            # Load output data
-            with open('output_data.json', 'r') as f:
-                output_data = json.load(f)
+    return Response(generate(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
 
-            # Process output data to calculate results for the front end
-            job_details = []
-            total_turnaround_time = 0
-            total_waiting_time = 0
-            num_jobs = len(output_data['turnaround_times'])
 
-            for job in output_data['turnaround_times']:
-                arrival_time = arrival_times[processes.index(job)]
-                burst_time = burst_times[processes.index(job)]
+@app.route('/jobs/<job_id>/profile.prof')
+def job_profile(job_id):
+    """Download the cProfile statistics of a profiled job, loadable with ``pstats``."""
+    prof = jobs.attachment(job_id)
+    if prof is None:
+        abort(404)
+    return Response(prof, mimetype='application/octet-stream',
+                    headers={'Content-Disposition': f'attachment; filename={job_id}.prof'})
 
-                gantt_entry = next((entry for entry in output_data['gantt_chart'] if entry[0] == job), None)
-                if gantt_entry:
-                    _, start_time, duration = gantt_entry
-                    finish_time = start_time + duration
 
-                    turnaround_time = output_data['turnaround_times'][job]
-                    waiting_time = output_data['waiting_times'][job]
+def render_result(result, profile_url=None):
+    """Render ``results.html`` for a ``simulate_job()`` result."""
+    start = time.perf_counter()
+    page = render_template('results.html', profile_url=profile_url, **result)
+    observe_stage('render_page', time.perf_counter() - start, result.get('algorithm', ''),
+                  len(result.get('job_details', ())))
+    return page
 
-                    total_turnaround_time += turnaround_time
-                    total_waiting_time += waiting_time
 
-                    job_details.append((job, arrival_time, burst_time, finish_time, turnaround_time, waiting_time))
+@app.route('/gantt.<fmt>')
+def gantt_chart(fmt):
+    """Serve the Gantt chart of a workload given as index-form query fields.
 
-            avg_turnaround_time = total_turnaround_time / num_jobs if num_jobs else 0
-            avg_waiting_time = total_waiting_time / num_jobs if num_jobs else 0
+    ``fmt`` is ``svg`` or ``png``, with one lane per CPU for multi-CPU
+    workloads. A cached result supplies the SVG without simulating again;
+    PNG rendering needs pygame.
+    """
+    if fmt not in ('svg', 'png'):
+        abort(404)
+    try:
+        data = parse_submission(request.args)
+        cached = result_cache.get(workload_key(data)) if fmt == 'svg' else None
+        if cached is not None and 'gantt_svg' in cached:
+            return Response(cached['gantt_svg'], mimetype='image/svg+xml')
+        result = run_simulation(data)
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
 
-            return render_template('results.html', job_details=job_details, avg_turnaround_time=avg_turnaround_time, avg_waiting_time=avg_waiting_time)
+    lanes = result.get('cpu_lanes')
+    if fmt == 'svg':
+        svg = render_lanes_svg(lanes) if lanes else render_svg(result['gantt_chart'])
+        return Response(svg, mimetype='image/svg+xml')
+    try:
+        png = render_lanes_png(lanes) if lanes else render_png(result['gantt_chart'])
+        return Response(png, mimetype='image/png')
+    except ImportError:
+        return jsonify(error="PNG rendering needs pygame."), 501
 
-        except (subprocess.CalledProcessError, FileNotFoundError, json.JSONDecodeError) as e:
-            flash(f"Error: {e}")
-            return redirect(url_for('index'))
 
-    return render_template('index.html')
+@app.route('/trace')
+def schedule_trace():
+    """Serve the schedule of a workload given as index-form query fields as a binary trace.
+
+    The trace is written straight from the engine's event stream; see
+    ``tracefile`` for the format.
+    """
+    try:
+        data = parse_submission(request.args)
+        events = iter_events(
+            data['processes'],
+            data['burst_times'],
+            data['arrival_times'],
+            data['algorithm'],
+            time_quantum=data.get('time_quantum'),
+            priorities=data.get('priorities'),
+            cpus=data.get('cpus', 1),
+            queue=data.get('cpu_queue', 'shared'),
+            quanta=data.get('quanta'),
+            boost_interval=data.get('boost_interval'),
+        )
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+
+    if 'cpus' in data:
+        # Traces keep the segments of each process, not the CPU they ran on
+        events = (event[:3] for event in events)
+    buffer = io.BytesIO()
+    write_trace(events, buffer)
+    return Response(buffer.getvalue(), mimetype='application/octet-stream',
+                    headers={'Content-Disposition': 'attachment; filename=schedule.trace'})
+
+
+@app.before_request
+def count_request():
+    requests_in_flight.inc()
+
+
+@app.teardown_request
+def uncount_request(exc=None):
+    requests_in_flight.dec()
+
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Serve stage latencies and the request, job and cache gauges in Prometheus text format."""
+    for state, count in jobs.counts().items():
+        jobs_gauge.set(count, state=state)
+    for counter, value in result_cache.stats().items():
+        cache_gauge.set(value, counter=counter)
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/cache/stats')
+def cache_stats():
+    return jsonify(result_cache.stats())
+
+
+@app.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    if jobs.cancel(job_id):
+        flash("The simulation was cancelled.")
+    return redirect(url_for('index'))
+
+
+@app.route('/stream')
+def stream_events():
+    """Stream the schedule of a workload given as index-form query fields.
+
+    Each event is sent as a Server-Sent Event named after its kind, with the
+    time and process (and for multi-CPU workloads the CPU) as JSON data,
+    followed by a final ``end`` event. Events are written as the engine
+    produces them.
+    """
+    try:
+        data = parse_submission(request.args)
+        events = iter_events(
+            data['processes'],
+            data['burst_times'],
+            data['arrival_times'],
+            data['algorithm'],
+            time_quantum=data.get('time_quantum'),
+            priorities=data.get('priorities'),
+            cpus=data.get('cpus', 1),
+            queue=data.get('cpu_queue', 'shared'),
+            quanta=data.get('quanta'),
+            boost_interval=data.get('boost_interval'),
+        )
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+
+    def generate():
+        for time, kind, process, *cpu in events:
+            payload = {'time': time, 'process': process}
+            if cpu:
+                payload['cpu'] = cpu[0]
+            yield f"event: {kind}\ndata: {json.dumps(payload)}\n\n"
+        yield "event: end\ndata: {}\n\n"
+
+    return Response(generate(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
+
+@app.route('/compare', methods=['POST'])
+def compare():
+    try:
+        data = parse_workload(request.form, files=request.files)
+        comparison = compare_policies(data)
+    except (ValueError, QueueFull, TimeoutError) as e:
+        flash(f"Error: {e}")
+        return redirect(url_for('index'))
+
+    return render_template('compare.html', comparison=comparison)
+
+@app.route('/sweep', methods=['POST'])
+def sweep():
+    """Evaluate Round Robin over ``min_quantum``..``max_quantum`` and return JSON.
+
+    The range may hold at most ``MAX_SWEEP_QUANTA`` quanta. The sweep runs on
+    the shared process pool and takes one of its slots until the pool has
+    finished its work.
+    """
+    try:
+        data = parse_workload(request.form, files=request.files)
+        try:
+            min_quantum = int(request.form['min_quantum'])
+            max_quantum = int(request.form['max_quantum'])
+        except (KeyError, ValueError):
+            raise ValueError("min_quantum and max_quantum must be integers.")
+        if min_quantum > max_quantum:
+            raise ValueError("min_quantum must not be greater than max_quantum.")
+        if max_quantum - min_quantum >= MAX_SWEEP_QUANTA:
+            raise ValueError(f"A sweep may cover at most {MAX_SWEEP_QUANTA} quanta.")
+        take_pool_slot()
+        futures = []
+        try:
+            result = sweep_quanta(
+                data['processes'],
+                data['burst_times'],
+                data['arrival_times'],
+                range(min_quantum, max_quantum + 1),
+                max_workers=POOL_WORKERS,
+                cpus=data.get('cpus', 1),
+                queue=data.get('cpu_queue', 'shared'),
+                pool=get_process_pool(),
+                timeout=POOL_TIMEOUT,
+                submitted=futures.extend,
+            )
+        finally:
+            # As for comparisons, the slot stays taken until the pool has
+            # finished the sweep's chunks, also those running past a timeout
+            if futures:
+                release_when_done(futures, pool_slots)
+            else:
+                pool_slots.release()
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+    except QueueFull as e:
+        return jsonify(error=str(e)), 503
+    except TimeoutError as e:
+        return jsonify(error=str(e)), 504
+
+    return jsonify(result)
+
 
 if __name__ == '__main__':
+    # Warm the job workers and live views in the serving process, not in the
+    # reloader that watches it
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        jobs.start()
+        visualizers.start()
     app.run(debug=True, port=5000)
\ No newline at end of file
@@ -0,0 +1,161 @@
+"""Benchmark suite for the scheduling engine.
+
+Times every policy on synthetic workloads from ``workloads.generate()`` and
+records jobs per second and peak traced memory. Results are written as JSON,
+by default to ``benchmarks/<commit>.json``, so runs from different commits
+can be diffed or compared with ``--baseline``.
+
+Usage:
+    python benchmark.py [--sizes 1000,10000,100000] [--algorithms FCFS,SJF]
+                        [--bursts KIND] [--arrivals KIND] [--seed S]
+                        [--output PATH] [--baseline PATH] [--no-memory]
+
+Sizes of 10**6 and 10**7 work too but take a while for the event-driven
+policies; ``FCFS fast`` is the NumPy path from ``fast_metrics()``.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+
+from scheduler import ALGORITHMS, fast_metrics, simulate
+from workloads import ARRIVAL_PATTERNS, BURST_DISTRIBUTIONS, generate
+
+CASES = ALGORITHMS + ('FCFS fast',)
+DEFAULT_SIZES = (10**3, 10**4, 10**5)
+TIME_QUANTUM = 4
+MLFQ_QUANTA = (4, 8, 16)
+MLFQ_BOOST_INTERVAL = 1000
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def run_case(case, workload):
+    """Schedule ``workload`` with one benchmark case and discard the result."""
+    if case == 'FCFS fast':
+        fast_metrics(workload['burst_times'], workload['arrival_times'])
+    else:
+        simulate(
+            workload['processes'],
+            workload['burst_times'],
+            workload['arrival_times'],
+            case,
+            time_quantum=TIME_QUANTUM,
+            priorities=workload['priorities'],
+            quanta=MLFQ_QUANTA,
+            boost_interval=MLFQ_BOOST_INTERVAL,
+        )
+
+
+def measure(case, workload, memory=True):
+    """Return ``(seconds, peak_bytes)`` for one case; memory is traced in a second run."""
+    start = time.perf_counter()
+    run_case(case, workload)
+    seconds = time.perf_counter() - start
+
+    peak = None
+    if memory:
+        tracemalloc.start()
+        try:
+            run_case(case, workload)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return seconds, peak
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=APP_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def run_benchmarks(sizes, cases, bursts, arrivals, seed, memory=True):
+    """Run every case at every size and return the list of result rows."""
+    rows = []
+    for n in sizes:
+        workload = generate(n, seed=seed, bursts=bursts, arrivals=arrivals)
+        for case in cases:
+            seconds, peak = measure(case, workload, memory)
+            row = {
+                'algorithm': case,
+                'n': n,
+                'seconds': seconds,
+                'jobs_per_sec': n / seconds if seconds else None,
+                'peak_mib': peak / 2**20 if peak is not None else None,
+            }
+            rows.append(row)
+            print(format_row(row), flush=True)
+    return rows
+
+
+def format_row(row, baseline=None):
+    peak = f"{row['peak_mib']:9.1f} MiB" if row['peak_mib'] is not None else ' ' * 13
+    line = f"{row['algorithm']:<12} n={row['n']:<9} {row['seconds']:9.3f} s {row['jobs_per_sec']:>13,.0f} jobs/s {peak}"
+    if baseline:
+        line += f"  x{baseline['seconds'] / row['seconds']:.2f} vs baseline"
+    return line
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the scheduling policies.")
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help="comma-separated process counts")
+    parser.add_argument('--algorithms', default=','.join(CASES),
+                        help="comma-separated cases out of: " + ', '.join(CASES))
+    parser.add_argument('--bursts', choices=BURST_DISTRIBUTIONS, default='uniform')
+    parser.add_argument('--arrivals', choices=ARRIVAL_PATTERNS, default='poisson')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="result file, default benchmarks/<commit>.json")
+    parser.add_argument('--baseline', help="earlier result file to compare against")
+    parser.add_argument('--no-memory', action='store_true', help="skip the traced-memory run")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    cases = [case.strip() for case in args.algorithms.split(',')]
+    unknown = [case for case in cases if case not in CASES]
+    if unknown:
+        parser.error(f"unknown algorithm: {', '.join(unknown)}")
+
+    commit = current_commit()
+    rows = run_benchmarks(sizes, cases, args.bursts, args.arrivals, args.seed, not args.no_memory)
+
+    report = {
+        'commit': commit,
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'workload': {'bursts': args.bursts, 'arrivals': args.arrivals, 'seed': args.seed,
+                     'time_quantum': TIME_QUANTUM, 'mlfq_quanta': MLFQ_QUANTA,
+                     'mlfq_boost_interval': MLFQ_BOOST_INTERVAL},
+        'results': rows,
+    }
+    output = args.output or os.path.join(APP_DIR, 'benchmarks', f'{commit}.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            previous = {(row['algorithm'], row['n']): row for row in json.load(f)['results']}
+        print(f"Compared with {args.baseline}:")
+        for row in rows:
+            print(format_row(row, previous.get((row['algorithm'], row['n']))))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,164 @@
+"""Memoizing cache for simulation results.
+
+Results are keyed on ``workload_key()``, a SHA-256 of the canonical JSON of
+the fields that decide a schedule. The time quantum only counts for Round
+Robin, priorities only for the Priority policies and the level quanta and
+boost interval only for MLFQ, so irrelevant form fields do not split the
+cache. Entries live in an in-memory LRU of ``max_entries``, which with a
+``max_bytes`` budget also holds at most that many bytes of JSON, and, when
+a ``path`` is given, in an SQLite file that survives restarts and is trimmed
+to ``max_disk_entries`` least recently used rows. Errors of the SQLite
+tier, such as a lock timeout, are logged and treated as misses, so a busy
+or broken file only costs the disk tier.
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from scheduler import PRIORITY_ALGORITHMS
+
+logger = logging.getLogger(__name__)
+
+
+def workload_key(data):
+    """Return the canonical hash of a parsed workload with its algorithm."""
+    algorithm = data['algorithm']
+    canonical = {
+        'processes': list(data['processes']),
+        'burst_times': list(data['burst_times']),
+        'arrival_times': list(data['arrival_times']),
+        'algorithm': algorithm,
+        'time_quantum': data.get('time_quantum') if algorithm == 'Round Robin' else None,
+        'priorities': list(data['priorities']) if algorithm in PRIORITY_ALGORITHMS else None,
+    }
+    # Added only where they apply, so the keys of other workloads stay as they were
+    if algorithm == 'MLFQ':
+        canonical['quanta'] = list(data['quanta'])
+        canonical['boost_interval'] = data.get('boost_interval')
+    if data.get('cpus', 1) > 1:
+        canonical['cpus'] = data['cpus']
+        canonical['cpu_queue'] = data['cpu_queue']
+    encoded = json.dumps(canonical, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+class ResultCache:
+    """Size-bounded LRU of JSON-serializable results with an optional SQLite tier."""
+
+    def __init__(self, max_entries=256, path=None, max_disk_entries=10000, max_bytes=None):
+        self.max_entries = max_entries
+        self.path = path
+        self.max_disk_entries = max_disk_entries
+        # Sizes are the length of an entry's JSON, so values must be
+        # JSON-serializable when a budget is set
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        if path:
+            try:
+                with self._connect() as db:
+                    db.execute(
+                        'CREATE TABLE IF NOT EXISTS results '
+                        '(key TEXT PRIMARY KEY, value TEXT NOT NULL, used REAL NOT NULL)'
+                    )
+            except sqlite3.Error:
+                logger.exception("Could not open the result cache file %s", path)
+
+    def get(self, key):
+        """Return the cached result for ``key``, or ``None`` on a miss."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+
+        if self.path:
+            try:
+                with self._connect() as db:
+                    row = db.execute('SELECT value FROM results WHERE key = ?', (key,)).fetchone()
+                    if row is not None:
+                        db.execute('UPDATE results SET used = ? WHERE key = ?', (time.time(), key))
+            except sqlite3.Error:
+                logger.exception("Could not read the result cache file %s", self.path)
+                row = None
+            if row is not None:
+                value = json.loads(row[0])
+                with self._lock:
+                    self.hits += 1
+                    self.disk_hits += 1
+                    self._remember(key, value, len(row[0]))
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, value):
+        """Store ``value`` under ``key`` in memory and, if enabled, on disk.
+
+        A value larger than the whole ``max_bytes`` budget is only stored on
+        disk.
+        """
+        encoded = json.dumps(value) if self.path or self.max_bytes is not None else None
+        with self._lock:
+            self._remember(key, value, len(encoded) if encoded is not None else 0)
+        if self.path:
+            try:
+                with self._connect() as db:
+                    db.execute(
+                        'INSERT OR REPLACE INTO results (key, value, used) VALUES (?, ?, ?)',
+                        (key, encoded, time.time()),
+                    )
+                    db.execute(
+                        'DELETE FROM results WHERE key IN '
+                        '(SELECT key FROM results ORDER BY used DESC LIMIT -1 OFFSET ?)',
+                        (self.max_disk_entries,),
+                    )
+            except sqlite3.Error:
+                logger.exception("Could not write the result cache file %s", self.path)
+
+    def stats(self):
+        """Return the hit/miss counters and the number and JSON size of the entries held in memory."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+            }
+
+    def _remember(self, key, value, size):
+        # Called with the lock held; size is the length of value's JSON
+        self._bytes -= self._sizes.pop(key, 0)
+        self._entries.pop(key, None)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        self._entries[key] = value
+        self._sizes[key] = size
+        self._bytes += size
+        while len(self._entries) > self.max_entries or (self.max_bytes is not None and self._bytes > self.max_bytes):
+            old_key, _ = self._entries.popitem(last=False)
+            self._bytes -= self._sizes.pop(old_key)
+
+    @contextmanager
+    def _connect(self):
+        # One short-lived connection per call keeps the cache usable from any thread
+        db = sqlite3.connect(self.path, timeout=10)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
@@ -0,0 +1,23 @@
+"""Shared fixtures: the app under test keeps its files out of the system temp directory."""
+
+import importlib
+
+import pytest
+
+
+@pytest.fixture(scope='session')
+def app_module(tmp_path_factory):
+    """The ``app`` module, imported with its job store and event spool under a temporary directory.
+
+    Its job queue is closed when the session ends.
+    """
+    root = tmp_path_factory.mktemp('app')
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv('SCHEDULER_JOB_STORE', str(root / 'jobs.sqlite3'))
+        monkeypatch.setenv('SCHEDULER_EVENT_DIR', str(root / 'events'))
+        monkeypatch.delenv('SCHEDULER_CACHE_PATH', raising=False)
+        module = importlib.import_module('app')
+        try:
+            yield module
+        finally:
+            module.jobs.close()
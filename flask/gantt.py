@@ -0,0 +1,220 @@
+"""Offscreen Gantt chart rendering.
+
+Turns a finished ``gantt_chart`` (``[process, start, end]`` segments, as in
+``output_data.json``) into an SVG string or PNG bytes without a display.
+Both renderers share ``layout()``, which works at pixel resolution: runs of
+segments narrower than a pixel are merged into one box, and time-axis labels
+are thinned to a "nice" step instead of one marker per time unit, so charts
+with thousands of segments stay small and readable.
+
+``render_lanes_svg()`` and ``render_lanes_png()`` stack one such chart per
+CPU of a multi-CPU schedule on a shared time axis. ``render_columns_svg()``
+draws a chart held as NumPy columns, as ``scheduler.Snapshot`` keeps it;
+``layout_columns()`` finds the same boxes with array operations, so only
+the boxes themselves cost Python work.
+
+The PNG path draws with pygame on a plain surface, which needs no video
+driver, and imports it only when called. It leaves the environment alone,
+so live views started later by the same process still open their windows.
+"""
+
+import io
+import math
+from html import escape
+
+import numpy as np
+
+WIDTH = 760
+HEIGHT = 110
+MARGIN = 10
+BAR_TOP = 30
+BAR_HEIGHT = 50
+MAX_TICKS = 10
+# Average glyph width of the label font, used to decide whether a label fits
+CHAR_WIDTH = 7
+
+BAR_COLOR = (100, 100, 255)
+BORDER_COLOR = (0, 0, 0)
+TEXT_COLOR = (0, 0, 0)
+BACKGROUND_COLOR = (255, 255, 255)
+
+
+def layout(gantt_chart, width=WIDTH, end_time=None):
+    """Return ``(boxes, ticks)`` for drawing ``gantt_chart`` ``width`` pixels wide.
+
+    ``boxes`` are ``[x_start, x_end, label]`` with ``label`` set to ``None``
+    when a box merges segments of different processes. ``ticks`` are
+    ``(x, time)`` pairs for the axis labels. The axis runs to ``end_time``,
+    by default the end of the last segment.
+    """
+    if end_time is None:
+        end_time = max((end for _, _, end in gantt_chart), default=0)
+    end_time = end_time or 1
+    scale = (width - 2 * MARGIN) / end_time
+
+    boxes = []
+    for process, start, end in gantt_chart:
+        x_start = MARGIN + start * scale
+        x_end = MARGIN + end * scale
+        if boxes:
+            last = boxes[-1]
+            # Touching neighbours merge while either of them is under a pixel wide
+            if x_start - last[1] < 1 and (x_end - x_start < 1 or last[1] - last[0] < 1):
+                last[1] = x_end
+                if last[2] != process:
+                    last[2] = None
+                continue
+        boxes.append([x_start, x_end, process])
+
+    step = tick_step(end_time)
+    ticks = [(MARGIN + t * scale, t) for t in range(0, end_time + 1, step)]
+    return boxes, ticks
+
+
+def layout_columns(names, pid, start, end, width=WIDTH, end_time=None):
+    """``layout()`` for segments given as columns: ``names[pid[k]]`` ran from ``start[k]`` to ``end[k]``.
+
+    The segments must not overlap and must be in time order, as on one CPU.
+    """
+    if end_time is None:
+        end_time = int(end.max()) if len(end) else 0
+    end_time = end_time or 1
+    scale = (width - 2 * MARGIN) / end_time
+
+    boxes = []
+    if len(pid):
+        x_start = MARGIN + start * scale
+        x_end = MARGIN + end * scale
+        # A segment starts a box of its own when it is a pixel or more past
+        # the previous one, and when it is a pixel or more wide and the box
+        # so far is too. Neither happens more often than there are pixels,
+        # so only those segments are looked at one by one.
+        gap = x_start[1:] - x_end[:-1] >= 1
+        wide = x_end[1:] - x_start[1:] >= 1
+        starts = [0]
+        for i in (np.flatnonzero(gap | wide) + 1).tolist():
+            if gap[i - 1] or x_end[i - 1] - x_start[starts[-1]] >= 1:
+                starts.append(i)
+        first = np.asarray(starts)
+        last = np.append(first[1:] - 1, len(pid) - 1)
+        # A box keeps its label when all of its segments are of one process
+        same = np.minimum.reduceat(pid, first) == np.maximum.reduceat(pid, first)
+        boxes = [[x0, x1, names[p] if single else None] for x0, x1, p, single in
+                 zip(x_start[first].tolist(), x_end[last].tolist(), pid[first].tolist(), same.tolist())]
+
+    step = tick_step(end_time)
+    ticks = [(MARGIN + t * scale, t) for t in range(0, end_time + 1, step)]
+    return boxes, ticks
+
+
+def tick_step(end_time, max_ticks=MAX_TICKS):
+    """Return the smallest 1, 2 or 5 times a power of ten giving at most ``max_ticks`` intervals."""
+    raw = end_time / max_ticks
+    if raw <= 1:
+        return 1
+    magnitude = 10 ** math.floor(math.log10(raw))
+    for factor in (1, 2, 5, 10):
+        if factor * magnitude >= raw:
+            return int(factor * magnitude)
+
+
+def _fits(label, box_width):
+    return label is not None and box_width > len(label) * CHAR_WIDTH + 4
+
+
+def render_svg(gantt_chart, width=WIDTH, height=HEIGHT):
+    """Return the chart as a standalone SVG document string."""
+    return _svg_document([gantt_chart], None, width, height)
+
+
+def render_columns_svg(names, pid, start, end, width=WIDTH, height=HEIGHT):
+    """``render_svg()`` for a single-CPU chart given as columns (see ``layout_columns()``)."""
+    return _svg_markup([layout_columns(names, pid, start, end, width)], None, width, height)
+
+
+def render_lanes_svg(lanes, width=WIDTH, height=HEIGHT):
+    """Return one chart per lane, labelled ``CPU 0``, ``CPU 1``, ..., as one SVG document.
+
+    Each lane is ``height`` pixels high and all lanes share the time axis.
+    """
+    return _svg_document(lanes, [f'CPU {cpu}' for cpu in range(len(lanes))], width, height)
+
+
+def _svg_document(lanes, titles, width, height):
+    end_time = max((end for lane in lanes for _, _, end in lane), default=0)
+    return _svg_markup([layout(lane, width, end_time) for lane in lanes], titles, width, height)
+
+
+def _svg_markup(layouts, titles, width, height):
+    fill = 'rgb({},{},{})'.format(*BAR_COLOR)
+    axis_y = BAR_TOP + BAR_HEIGHT
+    total_height = height * len(layouts)
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{total_height}" '
+        f'viewBox="0 0 {width} {total_height}" font-family="sans-serif" font-size="12">',
+    ]
+    for lane_index, (boxes, ticks) in enumerate(layouts):
+        parts.append(f'<g transform="translate(0,{lane_index * height})">')
+        if titles:
+            parts.append(f'<text x="{MARGIN}" y="12" font-weight="bold">{escape(titles[lane_index])}</text>')
+        parts.append(f'<g fill="{fill}" stroke="black">')
+        for x_start, x_end, _ in boxes:
+            parts.append(f'<rect x="{x_start:.1f}" y="{BAR_TOP}" width="{max(x_end - x_start, 1):.1f}" height="{BAR_HEIGHT}"/>')
+        parts.append('</g>')
+        for x_start, x_end, label in boxes:
+            if _fits(label, x_end - x_start):
+                parts.append(f'<text x="{x_start + 2:.1f}" y="{BAR_TOP - 6}">{escape(label)}</text>')
+        for x, time in ticks:
+            parts.append(f'<line x1="{x:.1f}" y1="{axis_y}" x2="{x:.1f}" y2="{axis_y + 6}" stroke="black"/>')
+            parts.append(f'<text x="{x:.1f}" y="{axis_y + 20}" text-anchor="middle">{time}</text>')
+        parts.append('</g>')
+    parts.append('</svg>')
+    return ''.join(parts)
+
+
+def render_png(gantt_chart, width=WIDTH, height=HEIGHT):
+    """Return the chart as PNG bytes, drawn with pygame on an offscreen surface."""
+    return _png_document([gantt_chart], None, width, height)
+
+
+def render_lanes_png(lanes, width=WIDTH, height=HEIGHT):
+    """PNG counterpart of ``render_lanes_svg()``."""
+    return _png_document(lanes, [f'CPU {cpu}' for cpu in range(len(lanes))], width, height)
+
+
+def _png_document(lanes, titles, width, height):
+    import pygame
+
+    pygame.font.init()
+    font = pygame.font.Font(None, 18)
+    glyphs = {}
+
+    def text(value):
+        if value not in glyphs:
+            glyphs[value] = font.render(str(value), True, TEXT_COLOR)
+        return glyphs[value]
+
+    end_time = max((end for lane in lanes for _, _, end in lane), default=0)
+    surface = pygame.Surface((width, height * len(lanes)))
+    surface.fill(BACKGROUND_COLOR)
+    for lane_index, lane in enumerate(lanes):
+        boxes, ticks = layout(lane, width, end_time)
+        top = lane_index * height
+        bar_top = top + BAR_TOP
+        axis_y = bar_top + BAR_HEIGHT
+        if titles:
+            surface.blit(text(titles[lane_index]), (MARGIN, top))
+        for x_start, x_end, label in boxes:
+            rect = (int(x_start), bar_top, max(int(x_end) - int(x_start), 1), BAR_HEIGHT)
+            pygame.draw.rect(surface, BAR_COLOR, rect)
+            pygame.draw.rect(surface, BORDER_COLOR, rect, 1)
+            if _fits(label, x_end - x_start):
+                surface.blit(text(label), (int(x_start) + 2, bar_top - 16))
+        for x, time in ticks:
+            pygame.draw.line(surface, BORDER_COLOR, (int(x), axis_y), (int(x), axis_y + 6))
+            glyph = text(time)
+            surface.blit(glyph, (int(x) - glyph.get_width() // 2, axis_y + 9))
+
+    buffer = io.BytesIO()
+    pygame.image.save(surface, buffer, 'gantt.png')
+    return buffer.getvalue()
@@ -0,0 +1,607 @@
+"""Bounded background job queue for simulations submitted over HTTP.
+
+Jobs run on at most ``workers`` long-lived worker processes. A worker pays
+for starting Python and importing the target once and then takes one job
+at a time over a pipe. A worker whose job times out or is cancelled is
+killed, which stops the job outright, and replaced by a fresh one when the
+next job needs it. Submissions beyond ``max_pending`` waiting jobs are
+refused, and only the last ``max_finished`` finished jobs are kept for
+their results.
+
+With a ``path``, every job is also recorded in an SQLite file, so that the
+server processes sharing it (e.g. gunicorn workers on one host) can all
+report the status and result of any job, whichever process accepted it.
+A finished job is then dropped from memory once it has been written, and
+its result and attachment are read back from the file.
+Jobs still run in the process that accepted them; cancelling the job of
+another process flags it in the file and its owner stops it.
+
+Job states are ``'queued'``, ``'running'``, ``'done'``, ``'failed'``,
+``'cancelled'`` and ``'timed out'``.
+"""
+
+import json
+import logging
+import multiprocessing
+import multiprocessing.connection
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+
+FINISHED_STATES = ('done', 'failed', 'cancelled', 'timed out')
+# Stage of each state in the job store; a job's stage only increases
+_STAGES = {'queued': 0, 'running': 1, **dict.fromkeys(FINISHED_STATES, 2)}
+
+logger = logging.getLogger(__name__)
+
+# forkserver avoids forking the threaded web server; spawn is the portable
+# fallback. The app's process pool for /compare and the visualizer pool use
+# the same context.
+if 'forkserver' in multiprocessing.get_all_start_methods():
+    process_context = multiprocessing.get_context('forkserver')
+    process_context.set_forkserver_preload(['scheduler'])
+else:
+    process_context = multiprocessing.get_context('spawn')
+
+
+class QueueFull(Exception):
+    """Raised by ``JobQueue.submit()`` when ``max_pending`` jobs are already waiting."""
+
+
+class Job:
+    """One submission and its progress through the queue."""
+
+    def __init__(self, job_id, data):
+        self.id = job_id
+        self.data = data
+        self.state = 'queued'
+        # Wall-clock times, comparable across the processes sharing a job store
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.result = None
+        # Bytes kept with a done job apart from its JSON result, set by on_done
+        self.attachment = None
+        self.error = None
+        self.worker = None
+
+    def status(self, position=None):
+        """Return a JSON-friendly summary, with the result once the job is done."""
+        return _status(self.id, self.state, self.submitted, self.started, self.finished, self.error, self.result,
+                       position)
+
+
+def _status(job_id, state, submitted, started, finished, error, result, position):
+    now = finished or time.time()
+    status = {
+        'id': job_id,
+        'state': state,
+        'queued_seconds': (started or now) - submitted,
+        'running_seconds': now - started if started else 0,
+    }
+    if position is not None:
+        status['position'] = position
+    if error:
+        status['error'] = error
+    if state == 'done':
+        status['result'] = result
+    return status
+
+
+class _JobStore:
+    """Job records in an SQLite file shared by the server processes of one host.
+
+    A row holds a job's state, times, error, JSON result and attachment, the
+    pid of the process that owns it and a flag set when another process
+    cancels it.
+    ``stage`` (0 queued, 1 running, 2 finished) only moves forwards, so
+    saves from different threads may arrive in any order.
+    """
+
+    def __init__(self, path, max_finished):
+        self.path = path
+        self.max_finished = max_finished
+        try:
+            with self._connect() as db:
+                db.execute('PRAGMA journal_mode=WAL')
+                db.execute(
+                    'CREATE TABLE IF NOT EXISTS jobs ('
+                    'id TEXT PRIMARY KEY, owner INTEGER NOT NULL, state TEXT NOT NULL, stage INTEGER NOT NULL, '
+                    'submitted REAL NOT NULL, started REAL, finished REAL, error TEXT, result TEXT, '
+                    'cancel INTEGER NOT NULL DEFAULT 0, attachment BLOB)'
+                )
+                # Files written before attachments were kept
+                columns = [row[1] for row in db.execute('PRAGMA table_info(jobs)')]
+                if 'attachment' not in columns:
+                    db.execute('ALTER TABLE jobs ADD COLUMN attachment BLOB')
+                db.execute('CREATE INDEX IF NOT EXISTS jobs_owner ON jobs (owner, stage, submitted)')
+                db.execute('CREATE INDEX IF NOT EXISTS jobs_finished ON jobs (stage, finished)')
+        except sqlite3.Error:
+            # Later reads and writes fail and are logged in turn
+            logger.exception("Could not open the job store %s", path)
+
+    def save(self, record):
+        """Write a record from ``JobQueue._changed()`` unless the row has moved past its stage."""
+        job_id, state, stage, submitted, started, finished, error, result, attachment = record
+        if state == 'done':
+            result = json.dumps(result)
+        else:
+            result = attachment = None
+        with self._connect() as db:
+            db.execute(
+                'INSERT INTO jobs (id, owner, state, stage, submitted, started, finished, error, result, attachment) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT (id) DO UPDATE SET state = excluded.state, stage = excluded.stage, '
+                'started = excluded.started, finished = excluded.finished, error = excluded.error, '
+                'result = excluded.result, attachment = excluded.attachment WHERE excluded.stage > jobs.stage',
+                (job_id, os.getpid(), state, stage, submitted, started, finished, error, result, attachment),
+            )
+            if stage == 2:
+                db.execute(
+                    'DELETE FROM jobs WHERE id IN (SELECT id FROM jobs WHERE stage = 2 '
+                    'ORDER BY finished DESC LIMIT -1 OFFSET ?)',
+                    (self.max_finished,),
+                )
+
+    def status(self, job_id):
+        """Return the status dictionary of ``job_id`` as recorded, or ``None``."""
+        with self._connect() as db:
+            row = db.execute(
+                'SELECT owner, state, stage, submitted, started, finished, error, result FROM jobs WHERE id = ?',
+                (job_id,),
+            ).fetchone()
+            if row is None:
+                return None
+            owner, state, stage, submitted, started, finished, error, result = row
+            position = None
+            if stage == 0:
+                position = db.execute(
+                    'SELECT COUNT(*) FROM jobs WHERE owner = ? AND stage = 0 AND submitted < ?',
+                    (owner, submitted),
+                ).fetchone()[0]
+        if stage < 2 and not _alive(owner):
+            state, position, error = 'failed', None, "The server process running the job has exited."
+        return _status(job_id, state, submitted, started, finished, error,
+                       json.loads(result) if result else None, position)
+
+    def attachment(self, job_id):
+        """Return the attachment of ``job_id`` as recorded, or ``None``."""
+        with self._connect() as db:
+            row = db.execute('SELECT attachment FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return row[0] if row is not None else None
+
+    def request_cancel(self, job_id):
+        """Flag an unfinished job for cancellation by its owner; returns whether it was unfinished."""
+        with self._connect() as db:
+            return db.execute('UPDATE jobs SET cancel = 1 WHERE id = ? AND stage < 2', (job_id,)).rowcount > 0
+
+    def cancel_requests(self):
+        """Return the ids of this process's unfinished jobs that another process cancelled."""
+        with self._connect() as db:
+            rows = db.execute('SELECT id FROM jobs WHERE owner = ? AND stage < 2 AND cancel = 1', (os.getpid(),))
+            return [job_id for job_id, in rows]
+
+    @contextmanager
+    def _connect(self):
+        # One short-lived connection per call, usable from any thread
+        db = sqlite3.connect(self.path, timeout=10)
+        try:
+            db.execute('PRAGMA synchronous=NORMAL')
+            with db:
+                yield db
+        finally:
+            db.close()
+
+
+def _alive(pid):
+    # Rows whose owner has gone will never be updated again. The current
+    # process only reaches here for jobs it no longer holds in memory, i.e.
+    # jobs of an earlier process that had the same pid.
+    if pid == os.getpid():
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class _Worker:
+    """A long-lived process that runs ``target`` for one job at a time."""
+
+    def __init__(self, target):
+        self.conn, child_conn = process_context.Pipe()
+        self.process = process_context.Process(target=_serve, args=(target, child_conn), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.job = None
+
+    def stop(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class JobQueue:
+    """Run ``target(data)`` for submitted jobs on a bounded set of worker processes.
+
+    ``target`` must be picklable and return a picklable value; a
+    ``ValueError`` it raises becomes the job's ``error``. ``on_done(job)`` is
+    called from the dispatcher thread, without the queue's lock held, for
+    every successful job with its ``data`` and ``result`` still set; the
+    job is reported as done once it returns, and as failed if it raises.
+    It may move bulky bytes out of the result into ``job.attachment``, which
+    is kept beside it and read with ``attachment()``. The dispatcher thread
+    and the workers are started by ``start()`` or the first submission and
+    stopped by ``close()``.
+    """
+
+    def __init__(self, target, workers=4, max_pending=64, timeout=60, max_finished=1000, poll_interval=0.1,
+                 on_done=None, path=None):
+        self.target = target
+        self.on_done = on_done
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.max_finished = max_finished
+        self.poll_interval = poll_interval
+        self._store = _JobStore(path, max_finished) if path else None
+        # Records of state changes not yet written to the store
+        self._changes = []
+        self._jobs = {}
+        self._workers = []
+        self._pending = OrderedDict()
+        self._running = {}
+        self._finished = OrderedDict()
+        self._lock = threading.Lock()
+        # The dispatcher waits on the workers' pipes and on this one, which
+        # submissions and cancellations write to
+        self._wakeup_reader, self._wakeup_writer = multiprocessing.Pipe(duplex=False)
+        self._woken = False
+        # Idle workers are kept ready unless starting one has just failed
+        self._refill = True
+        self._thread = None
+        self._closed = False
+
+    def submit(self, data, job_id=None):
+        """Queue ``data`` and return the new job id.
+
+        ``job_id`` picks the id in advance, e.g. to name files after the job
+        in ``data``; it defaults to a random one.
+        """
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("The job queue is closed.")
+            if len(self._pending) >= self.max_pending:
+                raise QueueFull(f"{self.max_pending} jobs are already waiting; try again later.")
+            job = Job(job_id or uuid.uuid4().hex, data)
+            self._jobs[job.id] = job
+            self._pending[job.id] = job
+            self._changed(job)
+        self._save_changes()
+        self.start()
+        return job.id
+
+    def start(self):
+        """Start the dispatcher thread and warm the workers, if that has not happened yet."""
+        with self._lock:
+            if self._closed:
+                return
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._dispatch, name='job-dispatcher', daemon=True)
+                self._thread.start()
+        self._wakeup()
+
+    def close(self):
+        """Stop the dispatcher thread and the workers, cancelling unfinished jobs.
+
+        Finished jobs can still be looked up; submitting raises ``RuntimeError``.
+        """
+        with self._lock:
+            self._closed = True
+            thread = self._thread
+        self._wakeup()
+        if thread is not None:
+            thread.join()
+        with self._lock:
+            unfinished = list(self._pending) + list(self._running)
+        for job_id in unfinished:
+            self.cancel(job_id)
+        with self._lock:
+            for worker in list(self._workers):
+                self._retire(worker)
+
+    def status(self, job_id):
+        """Return the status dictionary of ``job_id``, or ``None`` if it is unknown.
+
+        Jobs of other processes are looked up in the store.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                position = None
+                if job.state == 'queued':
+                    position = next((k for k, pending in enumerate(self._pending) if pending == job_id), None)
+                return job.status(position)
+        if self._store is None:
+            return None
+        try:
+            return self._store.status(job_id)
+        except sqlite3.Error:
+            logger.exception("Could not read job %s from %s", job_id, self._store.path)
+            return None
+
+    def attachment(self, job_id):
+        """Return the attachment of the done job ``job_id``, or ``None``.
+
+        Jobs of other processes are looked up in the store.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return job.attachment if job.state == 'done' else None
+        if self._store is None:
+            return None
+        try:
+            return self._store.attachment(job_id)
+        except sqlite3.Error:
+            logger.exception("Could not read job %s from %s", job_id, self._store.path)
+            return None
+
+    def counts(self):
+        """Return the number of queued and running jobs."""
+        with self._lock:
+            return {'queued': len(self._pending), 'running': len(self._running)}
+
+    def cancel(self, job_id):
+        """Cancel a queued or running job.
+
+        Returns ``False`` if it had already finished or its result is being
+        collected. The job of another process is flagged in the store and
+        cancelled by its owner shortly after.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None and self._store is not None:
+                try:
+                    return self._store.request_cancel(job_id)
+                except sqlite3.Error:
+                    logger.exception("Could not cancel job %s in %s", job_id, self._store.path)
+                    return False
+            if job is None or job.state in FINISHED_STATES:
+                return False
+            if job.state == 'running' and job.worker is None:
+                return False
+            if job.state == 'queued':
+                del self._pending[job_id]
+            else:
+                self._stop(job)
+            self._finish(job, 'cancelled')
+        self._save_changes()
+        self._wakeup()
+        return True
+
+    def _wakeup(self):
+        with self._lock:
+            if self._woken:
+                return
+            self._woken = True
+            self._wakeup_writer.send_bytes(b'')
+
+    def _dispatch(self):
+        while not self._closed:
+            try:
+                self._step()
+            except Exception:
+                # Whatever went wrong, later jobs must not be left queued forever
+                logger.exception("Job dispatcher error")
+
+    def _step(self):
+        with self._lock:
+            waiting = [self._wakeup_reader] + [worker.conn for worker in self._workers]
+        try:
+            ready = multiprocessing.connection.wait(waiting, self.poll_interval)
+        except (OSError, ValueError):
+            # A worker was retired, and its pipe closed, while we waited
+            ready = ()
+        with self._lock:
+            if self._wakeup_reader in ready:
+                self._wakeup_reader.recv_bytes()
+                self._woken = False
+            replied = self._reap()
+            active = bool(self._pending or self._running)
+
+        if self._store is not None and active:
+            try:
+                for job_id in self._store.cancel_requests():
+                    self.cancel(job_id)
+            except sqlite3.Error:
+                logger.exception("Could not read cancellations from %s", self._store.path)
+
+        # Results are unpickled and on_done runs without the lock, so status
+        # polls and submissions do not wait for them
+        for worker, job in replied:
+            try:
+                self._collect(worker, job)
+            except Exception as e:
+                logger.exception("Could not collect job %s", job.id)
+                with self._lock:
+                    if worker in self._workers:
+                        self._retire(worker)
+                    if job.state not in FINISHED_STATES:
+                        job.error = f"{type(e).__name__}: {e}"
+                        self._finish(job, 'failed')
+
+        with self._lock:
+            try:
+                while self._refill and len(self._workers) < self.workers:
+                    self._workers.append(_Worker(self.target))
+            except Exception:
+                # Left to _start(), which fails the job if it cannot start a worker either
+                logger.exception("Could not start a job worker")
+                self._refill = False
+            while self._pending and len(self._running) < self.workers:
+                _, job = self._pending.popitem(last=False)
+                try:
+                    self._start(job)
+                except Exception as e:
+                    logger.exception("Could not start job %s", job.id)
+                    job.error = f"The job could not be started: {e}"
+                    self._finish(job, 'failed')
+        self._save_changes()
+
+    def _changed(self, job):
+        # Called with the lock held whenever job changes state
+        if self._store is not None:
+            self._changes.append((job.id, job.state, _STAGES[job.state], job.submitted, job.started,
+                                  job.finished, job.error, job.result, job.attachment))
+
+    def _save_changes(self):
+        # Write the recorded state changes to the store, without the lock.
+        # Finished jobs that were written are forgotten, so their results are
+        # only held in the file; one that could not be written stays in memory.
+        if self._store is None:
+            return
+        with self._lock:
+            changes, self._changes = self._changes, []
+        saved = []
+        for record in changes:
+            try:
+                self._store.save(record)
+            except Exception:
+                logger.exception("Could not save job %s to %s", record[0], self._store.path)
+            else:
+                if record[2] == 2:
+                    saved.append(record[0])
+        if saved:
+            with self._lock:
+                for job_id in saved:
+                    if self._finished.pop(job_id, None) is not None:
+                        del self._jobs[job_id]
+
+    def _start(self, job):
+        worker = next((worker for worker in self._workers if worker.job is None), None)
+        if worker is None:
+            worker = _Worker(self.target)
+            self._workers.append(worker)
+            self._refill = True
+        try:
+            worker.conn.send(job.data)
+        except Exception:
+            self._retire(worker)
+            raise
+        worker.job = job
+        job.worker = worker
+        job.state = 'running'
+        job.started = time.time()
+        self._running[job.id] = job
+        self._changed(job)
+
+    def _reap(self):
+        # Retire dead workers and stop overrunning jobs, and return the
+        # (worker, job) pairs with a reply waiting. Their jobs are detached
+        # from the worker, so they can no longer be cancelled, while
+        # _collect() reads the reply.
+        now = time.time()
+        replied = []
+        for worker in list(self._workers):
+            job = worker.job
+            try:
+                if job is None:
+                    if not worker.process.is_alive():
+                        self._retire(worker)
+                elif worker.conn.poll():
+                    job.worker = None
+                    replied.append((worker, job))
+                elif not worker.process.is_alive():
+                    job.error = "The worker exited without a result."
+                    self._retire(worker)
+                    self._finish(job, 'failed')
+                elif self.timeout and now - job.started > self.timeout:
+                    self._stop(job)
+                    job.error = f"Timed out after {self.timeout} seconds."
+                    self._finish(job, 'timed out')
+            except Exception as e:
+                logger.exception("Could not check job %s", job.id if job else None)
+                if worker in self._workers:
+                    self._retire(worker)
+                if job is not None and job.state not in FINISHED_STATES:
+                    job.error = f"{type(e).__name__}: {e}"
+                    self._finish(job, 'failed')
+        return replied
+
+    def _collect(self, worker, job):
+        # Read the reply of worker's job and finish it; called without the lock
+        broken = False
+        try:
+            ok, payload = worker.conn.recv()
+        except (EOFError, OSError):
+            ok, payload = False, "The worker exited without a result."
+            broken = True
+        if ok:
+            job.result = payload
+            try:
+                if self.on_done is not None:
+                    self.on_done(job)
+            except Exception as e:
+                logger.exception("on_done failed for job %s", job.id)
+                ok, payload = False, f"{type(e).__name__}: {e}"
+        with self._lock:
+            if broken:
+                self._retire(worker)
+            else:
+                worker.job = None
+            if ok:
+                self._finish(job, 'done')
+            else:
+                job.error = payload
+                self._finish(job, 'failed')
+
+    def _stop(self, job):
+        # Killing the worker is the only way to stop a job midway
+        self._retire(job.worker)
+
+    def _retire(self, worker):
+        worker.stop()
+        self._workers.remove(worker)
+
+    def _finish(self, job, state):
+        job.state = state
+        job.finished = time.time()
+        job.data = None
+        self._running.pop(job.id, None)
+        if job.worker is not None:
+            job.worker.job = None
+            job.worker = None
+        self._finished[job.id] = job
+        self._changed(job)
+        while len(self._finished) > self.max_finished:
+            old_id, _ = self._finished.popitem(last=False)
+            del self._jobs[old_id]
+
+
+def _serve(target, conn):
+    # Worker process body: run target for each job's data sent over the pipe
+    # and reply with (ok, result-or-message), until the pipe is closed
+    while True:
+        try:
+            data = conn.recv()
+        except EOFError:
+            return
+        try:
+            reply = (True, target(data))
+        except ValueError as e:
+            reply = (False, str(e))
+        except Exception as e:
+            reply = (False, f"{type(e).__name__}: {e}")
+        try:
+            conn.send(reply)
+        except Exception as e:
+            # Nothing was written if the result could not be pickled
+            conn.send((False, f"{type(e).__name__}: {e}"))
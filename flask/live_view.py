@@ -0,0 +1,227 @@
+"""Drawing helpers shared by the pygame visualizers.
+
+``TextCache`` keeps rendered text surfaces so labels, numbers and queue
+entries are rendered once per distinct string. ``GanttLayer`` keeps the
+finished part of the Gantt chart and its time markers on an offscreen
+surface: the chart is scaled to the known end of the schedule, so markers
+are drawn once and each completed segment is added once, and a frame only
+blits the layer and draws the running segment on top. After a seek
+backwards only the part of the layer right of the last segment still
+completed is cleared back to the markers.
+
+``draw()`` in each visualizer repaints just its own regions and passes
+them to ``pygame.display.update()`` instead of flipping the whole display.
+
+``play()`` drives the replay of a precomputed trace at a chosen speed. The
+window runs at a fixed frame rate whatever the speed, and a frame is only
+drawn when the displayed time changes. ``LINGER`` and ``TIMEOUT`` let an
+unattended view close itself; they default to the ``VIEW_LINGER`` and
+``VIEW_TIMEOUT`` environment variables, and without those to waiting for
+the user.
+
+``load_font()`` and ``close()`` let ``visualizer_pool`` workers run the scripts
+again and again: fonts are loaded once per process, and with ``KEEP_ALIVE``
+set ``close()`` only closes the window and leaves pygame initialized.
+"""
+
+import os
+import time
+from functools import lru_cache
+
+import pygame
+
+from gantt import tick_step
+
+FPS = 60
+# Playback speeds, in simulated time units per second, stepped through with the arrow keys
+SPEEDS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, float('inf'))
+# Seconds the view stays open after the replay reaches the end; None waits for the user
+LINGER = float(os.environ['VIEW_LINGER']) if os.environ.get('VIEW_LINGER') else None
+# Seconds after which the view closes whatever its state; None never closes it
+TIMEOUT = float(os.environ['VIEW_TIMEOUT']) if os.environ.get('VIEW_TIMEOUT') else None
+# Set by pooled workers, which reuse one initialized pygame for many views
+KEEP_ALIVE = False
+
+
+@lru_cache(maxsize=None)
+def load_font(size):
+    """Return the default pygame font at ``size``, loaded once per process."""
+    return pygame.font.Font(None, size)
+
+
+def close():
+    """Close the view, and shut pygame down unless ``KEEP_ALIVE`` is set."""
+    if KEEP_ALIVE:
+        pygame.display.quit()
+    else:
+        pygame.quit()
+
+
+class TextCache:
+    """Memoize ``font.render(text, True, color)`` by text."""
+
+    def __init__(self, font, color, max_entries=4096):
+        self.font = font
+        self.color = color
+        self.max_entries = max_entries
+        self._surfaces = {}
+
+    def __call__(self, text):
+        text = str(text)
+        surface = self._surfaces.get(text)
+        if surface is None:
+            if len(self._surfaces) >= self.max_entries:
+                self._surfaces.clear()
+            surface = self.font.render(text, True, self.color)
+            self._surfaces[text] = surface
+        return surface
+
+
+class GanttLayer:
+    """Pre-rendered Gantt chart for a schedule that ends at ``end_time``.
+
+    The layer covers the screen band from the process labels above the bars
+    to the time labels below them; ``rect`` is that band in screen
+    coordinates.
+    """
+
+    def __init__(self, width, end_time, text, colors, left=50, top=150, bar_height=50):
+        self.window = max(end_time, 10)
+        self.unit_width = (width - 2 * left) / self.window
+        self.left = left
+        self.text = text
+        self.gantt_color, self.border_color, background_color = colors
+        # Band from 25 px above the bars to the time labels below them
+        self.rect = pygame.Rect(0, top - 25, width, 25 + bar_height + 50)
+        self.bar_top = 25
+        self.bar_height = bar_height
+        self.markers = pygame.Surface(self.rect.size)
+        self.markers.fill(background_color)
+
+        # Time markers are drawn once, thinned so that their labels do not overlap
+        axis_y = self.bar_top + bar_height
+        max_ticks = max((width - 2 * left) // (text(self.window).get_width() + 10), 1)
+        for i in range(0, self.window + 1, tick_step(self.window, max_ticks)):
+            x_pos = self.x(i)
+            pygame.draw.line(self.markers, self.border_color, (x_pos, axis_y), (x_pos, axis_y + 20), 2)
+            self.markers.blit(text(i), (x_pos - 10, axis_y + 25))
+
+        self.surface = self.markers.copy()
+        self.drawn = 0
+
+    def x(self, time):
+        return int(time * self.unit_width) + self.left
+
+    def draw(self, screen, completed, segment=None):
+        """Blit the chart with any new ``completed`` segments and the running ``segment``."""
+        if len(completed) < self.drawn:
+            self._erase_after(completed)
+        for process, segment_start, segment_end in completed[self.drawn:]:
+            self._draw_segment(self.surface, 0, process, segment_start, segment_end)
+        self.drawn = len(completed)
+
+        screen.blit(self.surface, self.rect)
+        if segment:
+            self._draw_segment(screen, self.rect.top, *segment)
+        return self.rect
+
+    def _erase_after(self, completed):
+        # Seeked backwards: segments end in time order, so the ones taken
+        # back all lie right of the end of the last one kept. Clear from
+        # there and redraw the kept segments that reach into that column.
+        cut = self.x(completed[-1][2]) if completed else 0
+        area = pygame.Rect(cut, 0, self.rect.width - cut, self.rect.height)
+        self.surface.blit(self.markers, area, area)
+        i = len(completed)
+        while i and self.x(completed[i - 1][2]) >= cut:
+            i -= 1
+        for process, segment_start, segment_end in completed[i:]:
+            self._draw_segment(self.surface, 0, process, segment_start, segment_end)
+        self.drawn = len(completed)
+
+    def _draw_segment(self, target, offset_y, process, segment_start, segment_end):
+        x_start = self.x(segment_start)
+        x_end = self.x(segment_end)
+        bar = (x_start, offset_y + self.bar_top, max(x_end - x_start, 1), self.bar_height)
+        pygame.draw.rect(target, self.gantt_color, bar)
+        # Borders would swallow bars only a few pixels wide
+        if bar[2] > 4:
+            pygame.draw.rect(target, self.border_color, bar, 2)
+        label = self.text(process)
+        # Skip labels that would spill over the next segment
+        if label.get_width() + 5 <= x_end - x_start:
+            target.blit(label, (x_start + 5, offset_y))
+
+
+def play(playback, draw, title, speed=1):
+    """Replay a ``scheduler.Playback`` until the window is closed.
+
+    The replay also returns ``LINGER`` seconds after it reaches the end, if
+    it is not seeked back, or ``TIMEOUT`` seconds after it started.
+
+    ``draw(frame)`` is called whenever the displayed time, speed or pause
+    state changes. ``speed`` is in simulated time units per second;
+    ``float('inf')`` jumps straight to the end.
+
+    Keys: space pauses, Right/Left step one time unit (and pause), Up/Down
+    change the speed, Home/End seek to the start/end and PageUp/PageDown
+    seek by a tenth of the run.
+    """
+    clock = pygame.time.Clock()
+    end_time = playback.end_time
+    jump = max(end_time // 10, 1)
+    position = 0.0
+    paused = False
+    shown = None
+    started = time.monotonic()
+    finished = None
+
+    while True:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                return
+            if event.type != pygame.KEYDOWN:
+                continue
+            if event.key == pygame.K_SPACE:
+                paused = not paused
+            elif event.key == pygame.K_RIGHT:
+                paused = True
+                position = int(position) + 1
+            elif event.key == pygame.K_LEFT:
+                paused = True
+                position = int(position) - 1
+            elif event.key == pygame.K_UP:
+                speed = next((s for s in SPEEDS if s > speed), speed)
+            elif event.key == pygame.K_DOWN:
+                speed = next((s for s in reversed(SPEEDS) if s < speed), speed)
+            elif event.key == pygame.K_HOME:
+                position = 0
+            elif event.key == pygame.K_END:
+                position = end_time
+            elif event.key == pygame.K_PAGEUP:
+                position = int(position) - jump
+            elif event.key == pygame.K_PAGEDOWN:
+                position = int(position) + jump
+
+        elapsed = clock.tick(FPS) / 1000
+        if not paused:
+            position += elapsed * speed
+        position = max(0, min(position, end_time))
+
+        state = (int(position), speed, paused)
+        if state != shown:
+            playback.seek(state[0])
+            draw(playback.frame())
+            label = 'max' if speed == float('inf') else f'x{speed:g}'
+            pygame.display.set_caption(f"{title} - {label}{' (paused)' if paused else ''}")
+            shown = state
+
+        now = time.monotonic()
+        if position < end_time or paused:
+            finished = None
+        elif finished is None:
+            finished = now
+        if LINGER is not None and finished is not None and now - finished >= LINGER:
+            return
+        if TIMEOUT is not None and now - started >= TIMEOUT:
+            return
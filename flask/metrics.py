@@ -0,0 +1,156 @@
+"""In-process metrics in the Prometheus text exposition format.
+
+``Registry`` holds histograms and gauges and renders them for a ``/metrics``
+endpoint. Histograms keep one set of cumulative bucket counts, a sum and a
+count per label combination; gauges keep one value per label combination.
+Everything is guarded by a lock, so the Flask threads can record freely.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+# Seconds; wide enough for a form parse and a timed-out simulation alike
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+# Upper bounds of the workload size label
+SIZE_BUCKETS = (10, 100, 1000, 10000, 100000, 1000000)
+
+
+def size_label(n):
+    """Return the workload size label for ``n`` processes, e.g. ``'<=1000'``."""
+    for bound in SIZE_BUCKETS:
+        if n <= bound:
+            return f'<={bound}'
+    return f'>{SIZE_BUCKETS[-1]}'
+
+
+class Stopwatch:
+    """Collect the seconds of named stages, for code that cannot reach a registry.
+
+    Simulation jobs run in worker processes; they time their stages with a
+    stopwatch and send ``seconds`` back with the result.
+    """
+
+    def __init__(self):
+        self.seconds = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] = self.seconds.get(name, 0) + time.perf_counter() - start
+
+
+class Histogram:
+    """Distribution of observed values, labelled by ``labelnames``."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            counts = series[0]
+            for k, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[k] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the seconds spent in the ``with`` block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        with self._lock:
+            series = [(key, list(counts), total, count) for key, (counts, total, count) in self._series.items()]
+        for key, counts, total, count in sorted(series):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                yield '_bucket', self.labelnames + ('le',), key + (f'{bound:g}',), cumulative
+            yield '_bucket', self.labelnames + ('le',), key + ('+Inf',), count
+            yield '_sum', self.labelnames, key, total
+            yield '_count', self.labelnames, key, count
+
+
+class Gauge:
+    """Current value, labelled by ``labelnames``."""
+
+    kind = 'gauge'
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def set(self, value, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            yield '', self.labelnames, key, value
+
+
+class Registry:
+    """Named collection of metrics rendered together by ``render()``."""
+
+    def __init__(self):
+        self._metrics = []
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._add(Histogram(name, help, labelnames, buckets))
+
+    def gauge(self, name, help, labelnames=()):
+        return self._add(Gauge(name, help, labelnames))
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """Return every metric in the Prometheus text format."""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for suffix, labelnames, key, value in metric.samples():
+                labels = ','.join(f'{name}="{_escape(value)}"' for name, value in zip(labelnames, key))
+                lines.append(f'{metric.name}{suffix}{{{labels}}} {value}' if labels else f'{metric.name}{suffix} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
@@ -0,0 +1,40 @@
+"""Opt-in cProfile capture for single simulation runs.
+
+``profile_call()`` runs a function under ``cProfile`` and returns its result
+with a report: the raw statistics in the ``.prof`` format that ``pstats``,
+snakeviz and similar tools load, and a summary of the hottest functions by
+own time. Nothing here is imported into the hot path unless a run asks for
+a profile.
+"""
+
+import cProfile
+import marshal
+import pstats
+
+# Functions listed in a profile summary
+PROFILE_TOP = 20
+
+
+def profile_call(function, *args, top=PROFILE_TOP):
+    """Call ``function(*args)`` under cProfile and return ``(result, prof_bytes, summary)``.
+
+    ``summary`` lists the ``top`` functions by own time as dictionaries with
+    ``function``, ``calls``, ``tottime`` and ``cumtime``.
+    """
+    profiler = cProfile.Profile()
+    result = profiler.runcall(function, *args)
+    profiler.create_stats()
+    # The same bytes Profile.dump_stats() writes to a file
+    prof_bytes = marshal.dumps(profiler.stats)
+
+    rows = sorted(profiler.stats.items(), key=lambda item: item[1][2], reverse=True)[:top]
+    summary = [
+        {
+            'function': pstats.func_std_string(function_key),
+            'calls': calls,
+            'tottime': tottime,
+            'cumtime': cumtime,
+        }
+        for function_key, (_, calls, tottime, cumtime, _) in rows
+    ]
+    return result, prof_bytes, summary
@@ -0,0 +1,1303 @@
+"""Headless event-driven scheduling engine.
+
+The visualizers and the Flask app share this module. A schedule is computed
+by jumping from event to event (arrival, completion, quantum expiry) instead
+of stepping one time unit at a time, so nothing here renders or sleeps.
+
+Every algorithm produces a trace of ``(time, kind, process)`` events where
+``kind`` is one of ``'arrive'``, ``'dispatch'``, ``'preempt'`` or
+``'complete'``, in the order they happen. The policies are generators, and
+``iter_events()`` hands that trace out lazily for streaming. The result dictionary has the same
+``gantt_chart`` / ``turnaround_times`` / ``waiting_times`` layout that the
+visualizers write to ``output_data.json``.
+
+SJF and Priority keep their ready queues in binary heaps, so each dispatch
+costs O(log n). SJF runs the ready process with the smallest burst and
+Priority the one with the highest priority number; ties go to the earlier
+arrival and then to the process listed first in the input.
+
+MLFQ (multi-level feedback queue) keeps one deque per level with its own
+quantum and a bitmap of the non-empty levels, so finding the highest
+non-empty level and dispatching from it is O(1) however many levels and
+processes there are. Processes drop a level when they use up its quantum
+and, with a boost interval, all return to the top level periodically.
+
+SRTF (shortest remaining time first) and Preemptive Priority use the same
+heaps. An arrival preempts the running process only when it beats it
+outright, which is a comparison with the top of the heap, so preemption
+checks also cost O(log n) per arrival. A preempted process goes back on the
+heap and every run on the CPU becomes its own Gantt segment.
+
+With ``cpus`` above 1 the workload runs on that many CPUs, either from one
+shared ready queue or from per-CPU queues where arrivals are dealt out in
+turn and an idle CPU steals the next job of a loaded queue. Events then
+carry the CPU as a fourth element, ``(time, kind, process, cpu)``, and the
+result adds one Gantt lane and the utilization per CPU. CPU timers live in
+a heap and idle CPUs in another, so a multi-CPU run also costs O(log n) per
+event whatever the core count.
+
+Internally processes are addressed by position through a ``ProcessTable``;
+names only appear in the event trace and the result dictionaries.
+
+A single-CPU run can keep checkpoints of the policy state (clock, ready
+queue with the remaining bursts, arrivals admitted so far) every
+``CHECKPOINT_INTERVAL`` dispatches. ``resimulate()`` then schedules an
+edited copy of the workload from the latest checkpoint before the first
+arrival the edit touches, and carries the earlier Gantt segments, start and
+finish times over instead of running the whole schedule again.
+
+Per-job metrics are computed with NumPy. ``summarize()`` derives turnaround
+and waiting arrays from finish times, and ``fast_metrics()`` gets the finish
+times of FCFS, SJF and Priority in closed form from the dispatch order, so
+large workloads can be scored without building an event trace.
+"""
+
+import heapq
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import deque
+from itertools import chain, islice, repeat
+from operator import itemgetter
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from time import monotonic
+
+import numpy as np
+
+from tracefile import write_trace
+
+ALGORITHMS = ('FCFS', 'SJF', 'Priority', 'Round Robin', 'SRTF', 'Preemptive Priority', 'MLFQ')
+# Algorithms that need a priority per process
+PRIORITY_ALGORITHMS = ('Priority', 'Preemptive Priority')
+# Ready-queue layouts of a multi-CPU run
+CPU_QUEUES = ('shared', 'per-cpu')
+
+# Dispatches between checkpoints, and at least the ready queue length, so
+# that copying the queue costs O(1) per dispatch on average
+CHECKPOINT_INTERVAL = 1024
+# Events between Playback keyframes, and at least a quarter of the ready
+# queue length: copying the queue costs O(1) per event on average, and the
+# copies take less memory than the events they cover
+KEYFRAME_INTERVAL = 1024
+
+# Keys of the dictionary returned by schedule_stats(), in display order
+STAT_KEYS = (
+    'avg_turnaround', 'p50_turnaround', 'p95_turnaround',
+    'avg_waiting', 'p50_waiting', 'p95_waiting',
+    'avg_response', 'throughput', 'context_switches', 'utilization',
+)
+
+
+class ProcessTable:
+    """Compact, index-addressed view of a workload.
+
+    Process ``i`` is ``names[i]`` and ``index`` maps each name back to ``i``.
+    Burst, arrival, priority, remaining time, first start and finish live in
+    parallel integer arrays, so the algorithms and the results builder share
+    one table instead of searching name lists. ``start`` and ``finish`` hold
+    -1 until the process is first dispatched or completes.
+    """
+
+    __slots__ = ('names', 'index', 'burst', 'arrival', 'priority', 'remaining', 'start', 'finish')
+
+    def __init__(self, processes, burst_times, arrival_times, priorities=None):
+        n = len(processes)
+        self.names = list(processes)
+        self.index = dict(zip(self.names, range(n)))
+        self.burst = array('q', burst_times)
+        self.arrival = array('q', arrival_times)
+        self.priority = array('q', priorities) if priorities is not None else None
+        self.remaining = array('q', burst_times)
+        self.start = array('q', [-1]) * n
+        self.finish = array('q', [-1]) * n
+
+    def __len__(self):
+        return len(self.names)
+
+
+class Snapshot:
+    """What ``resimulate()`` needs of a finished single-CPU run.
+
+    The workload and its policy, the first start and the finish of each
+    process, the Gantt segments as integer columns (``segment_pid`` indexes
+    ``names``) and the checkpoints taken along the run. There is no event
+    trace, so a snapshot stays cheap to keep and to send to another process.
+    """
+
+    __slots__ = ('algorithm', 'time_quantum', 'quanta', 'boost_interval', 'names', 'burst', 'arrival', 'priority',
+                 'start', 'finish', 'segment_pid', 'segment_start', 'segment_end', 'checkpoints')
+
+    def __init__(self, table, gantt_chart, checkpoints, algorithm, time_quantum=None, quanta=None,
+                 boost_interval=None, carried=None):
+        # carried holds the (pid, start, end) columns of segments that come
+        # before gantt_chart, as when a run resumes from a checkpoint
+        self.algorithm = algorithm
+        self.time_quantum = time_quantum if algorithm == 'Round Robin' else None
+        self.quanta = list(quanta) if algorithm == 'MLFQ' else None
+        self.boost_interval = boost_interval if algorithm == 'MLFQ' else None
+        self.names = table.names
+        self.burst = table.burst
+        self.arrival = table.arrival
+        self.priority = table.priority
+        self.start = table.start
+        self.finish = table.finish
+        self.segment_pid, self.segment_start, self.segment_end = carried or (array('q'), array('q'), array('q'))
+        self.segment_pid.extend(map(table.index.__getitem__, map(itemgetter(0), gantt_chart)))
+        self.segment_start.extend(map(itemgetter(1), gantt_chart))
+        self.segment_end.extend(map(itemgetter(2), gantt_chart))
+        self.checkpoints = checkpoints
+
+    def segments(self):
+        """Return the Gantt chart as NumPy columns ``(pid, start, end)`` without copying it."""
+        return tuple(np.frombuffer(column, dtype=np.int64)
+                     for column in (self.segment_pid, self.segment_start, self.segment_end))
+
+
+def simulate(processes, burst_times, arrival_times, algorithm, time_quantum=None, priorities=None,
+             cpus=1, queue='shared', checkpoints=False, quanta=None, boost_interval=None, tap=None):
+    """Run ``algorithm`` over the workload and return the result dictionary.
+
+    MLFQ takes the quantum of each level, top level first, in ``quanta``
+    and an optional ``boost_interval``. With ``checkpoints`` (single CPU
+    only) the result also has ``'snapshot'``, a ``Snapshot`` to hand to
+    ``resimulate()``. ``tap(events)`` wraps the event generator and must
+    yield the same events, e.g. to stream them while the run goes on.
+    """
+    checkpoint_list = [] if checkpoints else None
+    table, events = _start(processes, burst_times, arrival_times, algorithm, time_quantum, priorities, cpus, queue,
+                           checkpoint_list, quanta, boost_interval)
+    if tap is not None:
+        events = tap(events)
+    result = build_result(list(events), table, cpus)
+    if checkpoints:
+        result['snapshot'] = Snapshot(table, result['gantt_chart'], checkpoint_list, algorithm, time_quantum,
+                                      quanta, boost_interval)
+    return result
+
+
+def resimulate(snapshot, processes, burst_times, arrival_times, priorities=None, tap=None):
+    """Schedule an edited copy of the workload of ``snapshot`` with the same policy.
+
+    The run resumes from the latest checkpoint taken before the earliest
+    arrival the edit touches, i.e. the old or new arrival of every process
+    that was added, removed or given another burst, arrival or priority.
+    The schedule up to that checkpoint is the same for both workloads, so
+    its Gantt segments and the start and finish times inside it are carried
+    over. An edit that reorders the processes both workloads have changes
+    the tie-breaks and is run in full.
+
+    Returns a dictionary with ``'snapshot'``, the ``Snapshot`` of the new
+    run, whose ``segments()`` are the whole Gantt chart; ``'table'``, with
+    the start and finish of every process; ``'resumed_at'``, the clock of
+    the checkpoint used (0 for a full run); and ``'events'``, the trace from
+    that checkpoint on, the only part scheduled anew. Unlike ``simulate()``
+    there is no ``gantt_chart`` list and there are no per-process
+    dictionaries, which would cost as much as the run saves. ``tap(events)``
+    is as for ``simulate()`` and sees the whole schedule: the carried part
+    comes first as a dispatch and then a preemption or completion per
+    segment, without arrivals.
+    """
+    algorithm = snapshot.algorithm
+    time_quantum = snapshot.time_quantum
+    options = {'quanta': snapshot.quanta, 'boost_interval': snapshot.boost_interval}
+    table = check_workload(processes, burst_times, arrival_times, algorithm, time_quantum, priorities, **options)
+    checkpoints = []
+    changed_at, positions = _first_change(snapshot, table)
+    k = -1
+    if changed_at is not None:
+        k = bisect_left([checkpoint[0] for checkpoint in snapshot.checkpoints], changed_at) - 1
+    if k < 0:
+        events = _policy(table, algorithm, time_quantum, checkpoints=checkpoints, **options)
+        if tap is not None:
+            events = tap(events)
+        events = list(events)
+        return {
+            'events': events,
+            'table': table,
+            'resumed_at': 0,
+            'snapshot': Snapshot(table, _segments(events, table), checkpoints, algorithm, time_quantum, **options),
+        }
+
+    clock, cursor, dispatches, entries, left = snapshot.checkpoints[k]
+    index = table.index
+    if algorithm in ('FCFS', 'Round Robin'):
+        ready = [index[name] for name in entries]
+        ready_ids = ready
+    elif algorithm == 'MLFQ':
+        ready = [(level, index[name], used) for level, name, used in entries]
+        ready_ids = [i for _, i, _ in ready]
+    else:
+        ready = [(key, arrival, index[name]) for key, arrival, name in entries]
+        ready_ids = [i for _, _, i in ready]
+    for i, remaining in zip(ready_ids, left):
+        table.remaining[i] = remaining
+
+    # Processes first dispatched before the checkpoint keep their start, and
+    # those that completed by then keep their finish
+    kept = np.flatnonzero(positions >= 0)
+    for column, last in (('start', clock - 1), ('finish', clock)):
+        old = np.asarray(getattr(snapshot, column))[positions[kept]]
+        carried = (old >= 0) & (old <= last)
+        values = np.full(len(table), -1, dtype=np.int64)
+        values[kept[carried]] = old[carried]
+        setattr(table, column, array('q', values.tobytes()))
+
+    # Carried segments only need their pids moved to the new positions
+    new_positions = np.full(len(snapshot.names), -1, dtype=np.int64)
+    new_positions[positions[kept]] = kept
+    carried = (
+        array('q', new_positions[np.asarray(snapshot.segment_pid[:dispatches])].tobytes()),
+        snapshot.segment_start[:dispatches],
+        snapshot.segment_end[:dispatches],
+    )
+
+    events = _policy(table, algorithm, time_quantum, checkpoints=checkpoints,
+                     resume=(clock, cursor, dispatches, ready), **options)
+    if tap is not None:
+        # The tap passes the replayed events back first; they are dropped again
+        events = islice(tap(chain(_replay(table, *carried), events)), 2 * dispatches, None)
+    events = list(events)
+    return {
+        'events': events,
+        'table': table,
+        'resumed_at': clock,
+        'snapshot': Snapshot(table, _segments(events, table), snapshot.checkpoints[:k + 1] + checkpoints, algorithm,
+                             time_quantum, carried=carried, **options),
+    }
+
+
+def _replay(table, segment_pid, segment_start, segment_end):
+    # Dispatch and preempt or complete events of carried segments; a segment
+    # that ends at its process's finish is the one that completed it
+    names = table.names
+    finish = table.finish
+    for i, start, end in zip(segment_pid, segment_start, segment_end):
+        yield start, 'dispatch', names[i]
+        yield end, 'complete' if finish[i] == end else 'preempt', names[i]
+
+
+def _first_change(snapshot, table):
+    # Earliest arrival the edit from the snapshot's workload to table touches
+    # (inf for no edit, None when the shared processes were reordered), and
+    # the snapshot position of each process of table, -1 for new ones
+    if table.names == snapshot.names:
+        positions = np.arange(len(table), dtype=np.int64)
+    else:
+        old_index = dict(zip(snapshot.names, range(len(snapshot.names))))
+        positions = np.fromiter(map(old_index.get, table.names, repeat(-1)), dtype=np.int64, count=len(table))
+    kept = positions >= 0
+    old = positions[kept]
+    if (np.diff(old) < 0).any():
+        return None, positions
+
+    arrival = np.asarray(table.arrival)
+    old_arrival = np.asarray(snapshot.arrival)[old]
+    changed = (np.asarray(table.burst)[kept] != np.asarray(snapshot.burst)[old]) | (arrival[kept] != old_arrival)
+    if table.priority is not None:
+        changed |= np.asarray(table.priority)[kept] != np.asarray(snapshot.priority)[old]
+    removed = np.ones(len(snapshot.names), dtype=bool)
+    removed[old] = False
+    touched = np.concatenate((
+        arrival[~kept], arrival[kept][changed], old_arrival[changed], np.asarray(snapshot.arrival)[removed],
+    ))
+    return (int(touched.min()) if len(touched) else float('inf')), positions
+
+
+def iter_events(processes, burst_times, arrival_times, algorithm, time_quantum=None, priorities=None,
+                cpus=1, queue='shared', quanta=None, boost_interval=None):
+    """Return a generator over the event trace of ``algorithm``.
+
+    The workload is validated up front; events are then produced lazily as
+    the schedule advances, so a consumer can forward them without the whole
+    trace being held in memory.
+    """
+    return _start(processes, burst_times, arrival_times, algorithm, time_quantum, priorities, cpus, queue,
+                  quanta=quanta, boost_interval=boost_interval)[1]
+
+
+def _start(processes, burst_times, arrival_times, algorithm, time_quantum, priorities, cpus=1, queue='shared',
+           checkpoints=None, quanta=None, boost_interval=None):
+    # Validate the workload and return its table and the policy's event generator
+    table = check_workload(processes, burst_times, arrival_times, algorithm, time_quantum, priorities, cpus, queue,
+                           quanta, boost_interval)
+    if checkpoints is not None and cpus > 1:
+        raise ValueError("Checkpoints are only taken on a single CPU.")
+    return table, _policy(table, algorithm, time_quantum, cpus, queue, checkpoints, quanta=quanta,
+                          boost_interval=boost_interval)
+
+
+def check_workload(processes, burst_times, arrival_times, algorithm, time_quantum, priorities, cpus=1,
+                   queue='shared', quanta=None, boost_interval=None):
+    """Validate a workload as ``simulate()`` takes it and return its ``ProcessTable``.
+
+    Raises ``ValueError`` with a message meant for the user, so callers can
+    reject a workload before queueing it rather than when it runs.
+    """
+    n = len(processes)
+    if len(burst_times) != n or len(arrival_times) != n:
+        raise ValueError("The number of processes, burst times, and arrival times must match.")
+    if n and min(burst_times) <= 0:
+        raise ValueError("Burst times must be positive integers.")
+    if n and min(arrival_times) < 0:
+        raise ValueError("Arrival times must not be negative.")
+    if algorithm in PRIORITY_ALGORITHMS and (priorities is None or len(priorities) != n):
+        raise ValueError("Number of priorities must match number of processes.")
+    if cpus < 1:
+        raise ValueError("The number of CPUs must be a positive integer.")
+    if queue not in CPU_QUEUES:
+        raise ValueError(f"Unknown ready queue layout: {queue}")
+
+    table = ProcessTable(processes, burst_times, arrival_times,
+                         priorities if algorithm in PRIORITY_ALGORITHMS else None)
+    if len(table.index) != n:
+        raise ValueError("Process names must be unique.")
+    if '' in table.index:
+        raise ValueError("Process names must not be empty.")
+
+    if algorithm == 'Round Robin' and (time_quantum is None or time_quantum <= 0):
+        raise ValueError("Time quantum must be a positive integer.")
+    if algorithm == 'MLFQ':
+        if not quanta or min(quanta) <= 0:
+            raise ValueError("MLFQ needs a positive time quantum for every level.")
+        if boost_interval is not None and boost_interval <= 0:
+            raise ValueError("The MLFQ boost interval must be a positive integer.")
+        if cpus > 1:
+            raise ValueError("MLFQ runs on a single CPU.")
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"Unknown algorithm: {algorithm}")
+    return table
+
+
+def _policy(table, algorithm, time_quantum, cpus=1, queue='shared', checkpoints=None, resume=None,
+            quanta=None, boost_interval=None):
+    # The event generator of algorithm over a validated table
+    if cpus > 1:
+        keys = None
+        if algorithm == 'SJF':
+            keys = table.burst
+        elif algorithm in PRIORITY_ALGORITHMS:
+            # Higher number means higher priority
+            keys = array('q', [-p for p in table.priority])
+        return _multi_cpu(
+            table, cpus, queue == 'per-cpu',
+            fifo=algorithm in ('FCFS', 'Round Robin'),
+            keys=keys,
+            time_quantum=time_quantum if algorithm == 'Round Robin' else None,
+            preemptive=algorithm in ('SRTF', 'Preemptive Priority'),
+        )
+    if algorithm == 'FCFS':
+        return _non_preemptive(table, checkpoints=checkpoints, resume=resume)
+    if algorithm == 'SJF':
+        return _non_preemptive(table, table.burst, checkpoints, resume)
+    if algorithm == 'Priority':
+        # Higher number means higher priority
+        return _non_preemptive(table, array('q', [-p for p in table.priority]), checkpoints, resume)
+    if algorithm == 'Round Robin':
+        return _round_robin(table, time_quantum, checkpoints, resume)
+    if algorithm == 'SRTF':
+        return _preemptive(table, checkpoints=checkpoints, resume=resume)
+    if algorithm == 'MLFQ':
+        return _mlfq(table, list(quanta), boost_interval, checkpoints, resume)
+    return _preemptive(table, array('q', [-p for p in table.priority]), checkpoints, resume)
+
+
+def build_result(events, table, cpus=1):
+    """Turn an event trace into the ``output_data.json`` structure.
+
+    Fills ``table.start`` and ``table.finish`` along the way; the table is
+    returned under ``'table'`` for callers that want index-based access.
+    With ``cpus`` above 1 the events carry their CPU, and the result also
+    has ``cpu_lanes``, the Gantt chart of each CPU, and ``utilization``, the
+    busy fraction of each CPU between the first arrival and the last
+    completion.
+    """
+    finish = table.finish
+    if cpus == 1:
+        gantt_chart = _segments(events, table)
+    else:
+        index = table.index
+        start = table.start
+        started = array('q', start)
+        gantt_chart = []
+        cpu_lanes = [[] for _ in range(cpus)]
+        busy = [0] * cpus
+        for time, kind, process, cpu in events:
+            i = index[process]
+            if kind == 'dispatch':
+                if start[i] < 0:
+                    start[i] = time
+                started[i] = time
+            elif kind in ('preempt', 'complete'):
+                segment = [process, started[i], time]
+                gantt_chart.append(segment)
+                cpu_lanes[cpu].append(segment)
+                busy[cpu] += time - started[i]
+                if kind == 'complete':
+                    finish[i] = time
+
+    names = table.names
+    stats = summarize(table.burst, table.arrival, finish)
+    completion_times = dict(zip(names, finish.tolist()))
+    turnaround_times = dict(zip(names, stats['turnaround'].tolist()))
+    waiting_times = dict(zip(names, stats['waiting'].tolist()))
+
+    result = {
+        'gantt_chart': gantt_chart,
+        'turnaround_times': turnaround_times,
+        'waiting_times': waiting_times,
+        'completion_times': completion_times,
+        'events': events,
+        'table': table,
+    }
+    if cpus > 1:
+        span = int(stats['finish'].max() - min(table.arrival)) if len(table) else 0
+        result['cpu_lanes'] = cpu_lanes
+        result['utilization'] = [b / span if span else 0 for b in busy]
+    return result
+
+
+def _segments(events, table):
+    # Gantt segments of a single-CPU event trace, filling in table.start and
+    # table.finish of the processes it dispatches and completes
+    index = table.index
+    start = table.start
+    finish = table.finish
+    started = array('q', start)
+    gantt_chart = []
+    for time, kind, process in events:
+        i = index[process]
+        if kind == 'dispatch':
+            if start[i] < 0:
+                start[i] = time
+            started[i] = time
+        elif kind in ('preempt', 'complete'):
+            gantt_chart.append([process, started[i], time])
+            if kind == 'complete':
+                finish[i] = time
+    return gantt_chart
+
+
+def summarize(burst_times, arrival_times, finish_times):
+    """Return per-job finish, turnaround and waiting arrays plus their averages."""
+    burst = np.asarray(burst_times, dtype=np.int64)
+    arrival = np.asarray(arrival_times, dtype=np.int64)
+    finish = np.asarray(finish_times, dtype=np.int64)
+    turnaround = finish - arrival
+    waiting = turnaround - burst
+    n = len(finish)
+    return {
+        'finish': finish,
+        'turnaround': turnaround,
+        'waiting': waiting,
+        'avg_turnaround': float(turnaround.mean()) if n else 0,
+        'avg_waiting': float(waiting.mean()) if n else 0,
+    }
+
+
+def schedule_stats(result):
+    """Condense a ``simulate()`` result into the figures compared across policies.
+
+    Averages and percentiles of turnaround and waiting time, throughput in
+    jobs per time unit between the first arrival and the last completion,
+    average response time (arrival to first dispatch), the number of
+    context switches (dispatches after the first one on each CPU), and the
+    utilization, the busy fraction of all CPUs over that same span.
+    """
+    table = result['table']
+    stats = summarize(table.burst, table.arrival, table.finish)
+    turnaround = stats['turnaround']
+    waiting = stats['waiting']
+    n = len(table)
+    if not n:
+        return dict.fromkeys(STAT_KEYS, 0)
+
+    dispatches = sum(1 for event in result['events'] if event[1] == 'dispatch')
+    lanes = result.get('cpu_lanes', [result['gantt_chart']])
+    span = int(stats['finish'].max() - min(table.arrival))
+    p50_turnaround, p95_turnaround = np.percentile(turnaround, (50, 95)).tolist()
+    p50_waiting, p95_waiting = np.percentile(waiting, (50, 95)).tolist()
+    response = np.asarray(table.start) - np.asarray(table.arrival)
+    return {
+        'avg_turnaround': stats['avg_turnaround'],
+        'p50_turnaround': p50_turnaround,
+        'p95_turnaround': p95_turnaround,
+        'avg_waiting': stats['avg_waiting'],
+        'p50_waiting': p50_waiting,
+        'p95_waiting': p95_waiting,
+        'avg_response': float(response.mean()),
+        'throughput': n / span,
+        'context_switches': dispatches - sum(1 for lane in lanes if lane),
+        'utilization': sum(table.burst) / (span * len(lanes)),
+    }
+
+
+def simulate_stats(processes, burst_times, arrival_times, algorithm, time_quantum=None, priorities=None,
+                   cpus=1, queue='shared', quanta=None, boost_interval=None):
+    """Run ``simulate()`` and return only its ``schedule_stats()``.
+
+    The return value is small, so this is the function to hand to a process
+    pool when several policies run side by side.
+    """
+    result = simulate(processes, burst_times, arrival_times, algorithm,
+                      time_quantum=time_quantum, priorities=priorities, cpus=cpus, queue=queue,
+                      quanta=quanta, boost_interval=boost_interval)
+    return schedule_stats(result)
+
+
+def sweep_quanta(processes, burst_times, arrival_times, quanta, max_workers=None, cpus=1, queue='shared',
+                 pool=None, timeout=None, submitted=None):
+    """Evaluate Round Robin for every time quantum in ``quanta`` on a process pool.
+
+    The quanta are dealt out in turn to ``max_workers`` tasks (by default
+    one per CPU core), so each task receives the workload once and the
+    cheap large quanta are spread evenly over them. ``pool`` is an executor
+    to reuse; without one a pool is started for the call. With a
+    ``timeout`` the tasks that have not started after that many seconds are
+    cancelled and ``TimeoutError`` is raised. ``submitted(futures)`` is
+    called with the futures of the tasks once they are queued on ``pool``,
+    e.g. to track when the pool is done with them: tasks that were already
+    running go on after a timeout.
+
+    Returns a dictionary with ``results``, one ``schedule_stats()``
+    dictionary per quantum with its ``time_quantum`` added, and the
+    ``best`` quantum: the lowest average waiting time, then the fewest
+    context switches, then the smallest quantum.
+    """
+    quanta = list(quanta)
+    if not quanta:
+        raise ValueError("At least one time quantum is required.")
+    if any(time_quantum <= 0 for time_quantum in quanta):
+        raise ValueError("Time quantum must be a positive integer.")
+
+    tasks = min(max_workers or os.cpu_count() or 1, len(quanta))
+    workload = (processes, burst_times, arrival_times, cpus, queue)
+    if pool is None:
+        with ProcessPoolExecutor(max_workers=tasks) as own_pool:
+            return sweep_quanta(processes, burst_times, arrival_times, quanta, tasks, cpus, queue, own_pool, timeout)
+
+    futures = []
+    try:
+        for k in range(tasks):
+            futures.append(pool.submit(_sweep_chunk, workload, quanta[k::tasks]))
+    finally:
+        if submitted is not None and futures:
+            submitted(futures)
+    deadline = monotonic() + timeout if timeout else None
+    try:
+        chunks = [future.result(timeout=deadline and max(deadline - monotonic(), 0)) for future in futures]
+    except FutureTimeout:
+        for future in futures:
+            future.cancel()
+        raise TimeoutError(f"The sweep did not finish within {timeout} seconds.")
+    stats = [None] * len(quanta)
+    for k, chunk in enumerate(chunks):
+        stats[k::tasks] = chunk
+
+    results = [dict(time_quantum=time_quantum, **row) for time_quantum, row in zip(quanta, stats)]
+    best = min(results, key=lambda row: (row['avg_waiting'], row['context_switches'], row['time_quantum']))
+    return {'results': results, 'best': best['time_quantum']}
+
+
+def _sweep_chunk(workload, quanta):
+    processes, burst_times, arrival_times, cpus, queue = workload
+    return [
+        simulate_stats(processes, burst_times, arrival_times, 'Round Robin', time_quantum=time_quantum,
+                       cpus=cpus, queue=queue)
+        for time_quantum in quanta
+    ]
+
+
+def fast_metrics(burst_times, arrival_times, algorithm='FCFS', priorities=None):
+    """Score a non-preemptive policy without an event trace.
+
+    Returns the ``summarize()`` dictionary plus the dispatch ``order`` as an
+    array of input positions. FCFS is fully vectorized; SJF and Priority need
+    one heap pass to find the dispatch order, after which the arithmetic is
+    vectorized as well.
+    """
+    burst = np.asarray(burst_times, dtype=np.int64)
+    arrival = np.asarray(arrival_times, dtype=np.int64)
+    n = len(burst)
+    if len(arrival) != n:
+        raise ValueError("The number of processes, burst times, and arrival times must match.")
+    if n and burst.min() <= 0:
+        raise ValueError("Burst times must be positive integers.")
+    if n and arrival.min() < 0:
+        raise ValueError("Arrival times must not be negative.")
+
+    if algorithm == 'FCFS':
+        # Traces usually come sorted by arrival; skip the sort when they do
+        if n < 2 or not (arrival[1:] < arrival[:-1]).any():
+            order = np.arange(n)
+        else:
+            order = np.argsort(arrival, kind='stable')
+    elif algorithm == 'SJF':
+        order = _dispatch_order(burst, arrival, burst)
+    elif algorithm == 'Priority':
+        if priorities is None or len(priorities) != n:
+            raise ValueError("Number of priorities must match number of processes.")
+        # Higher number means higher priority
+        order = _dispatch_order(burst, arrival, -np.asarray(priorities, dtype=np.int64))
+    else:
+        raise ValueError(f"No closed-form metrics for algorithm: {algorithm}")
+
+    # With jobs run back to back in dispatch order, job k finishes at
+    # max over j <= k of (arrival[j] + burst[j] + ... + burst[k])
+    ordered_burst = burst[order]
+    elapsed = np.cumsum(ordered_burst)
+    latest = arrival[order]
+    latest -= elapsed
+    latest += ordered_burst
+    np.maximum.accumulate(latest, out=latest)
+    latest += elapsed
+    finish = np.empty(n, dtype=np.int64)
+    finish[order] = latest
+
+    stats = summarize(burst, arrival, finish)
+    stats['order'] = order
+    return stats
+
+
+def _dispatch_order(burst, arrival, keys):
+    # Same heap and tie-breaks as _non_preemptive, but only the order is kept
+    burst = burst.tolist()
+    arrival = arrival.tolist()
+    keys = keys.tolist()
+    n = len(burst)
+    order = _arrival_order(arrival)
+    dispatched = []
+    ready = []
+    cursor = 0
+    clock = 0
+    while cursor < n or ready:
+        while cursor < n and arrival[order[cursor]] <= clock:
+            i = order[cursor]
+            heapq.heappush(ready, (keys[i], arrival[i], i))
+            cursor += 1
+        if not ready:
+            clock = arrival[order[cursor]]
+            continue
+        i = heapq.heappop(ready)[2]
+        dispatched.append(i)
+        clock += burst[i]
+    return np.array(dispatched, dtype=np.intp)
+
+
+def _arrival_order(arrival_times):
+    # Processes arriving at the same time are admitted in input order
+    return np.argsort(np.asarray(arrival_times, dtype=np.int64), kind='stable').tolist()
+
+
+def _checkpoint(table, clock, cursor, dispatches, ready):
+    # State of a single-CPU policy at the top of its loop, where no process
+    # is running: (clock, cursor, dispatches, ready, remaining). Ready
+    # processes are recorded by name, heap entries with their key and
+    # arrival, so the checkpoint holds for an edited workload too;
+    # resimulate() maps them back to positions and restarts the policy with
+    # resume=(clock, cursor, dispatches, ready). Every dispatch makes one
+    # Gantt segment, so dispatches also counts the segments finished so far.
+    names = table.names
+    remaining = table.remaining
+    if isinstance(ready, deque):
+        return clock, cursor, dispatches, [names[i] for i in ready], [remaining[i] for i in ready]
+    entries = [(key, arrival, names[i]) for key, arrival, i in ready]
+    return clock, cursor, dispatches, entries, [remaining[i] for _, _, i in ready]
+
+
+def _non_preemptive(table, keys=None, checkpoints=None, resume=None):
+    # Without keys the ready queue is FIFO (FCFS). Otherwise it is a binary
+    # heap of (keys[i], arrival, i): the smallest key wins, ties go to the
+    # earlier arrival and then to the process listed first in the input.
+    # checkpoints and resume are described at _checkpoint().
+    names = table.names
+    burst_times = table.burst
+    arrival_times = table.arrival
+    n = len(table)
+    order = _arrival_order(arrival_times)
+    cursor = 0
+    clock = 0
+    dispatches = 0
+
+    if keys is None:
+        ready = deque()
+        push = ready.append
+        pop = ready.popleft
+    else:
+        ready = []
+        push = lambda i: heapq.heappush(ready, (keys[i], arrival_times[i], i))
+        pop = lambda: heapq.heappop(ready)[2]
+    if resume is not None:
+        clock, cursor, dispatches, entries = resume
+        ready.extend(entries)
+    checkpointed = dispatches
+
+    while cursor < n or ready:
+        if checkpoints is not None and dispatches - checkpointed >= max(CHECKPOINT_INTERVAL, len(ready)):
+            checkpoints.append(_checkpoint(table, clock, cursor, dispatches, ready))
+            checkpointed = dispatches
+        while cursor < n and arrival_times[order[cursor]] <= clock:
+            i = order[cursor]
+            push(i)
+            yield arrival_times[i], 'arrive', names[i]
+            cursor += 1
+        if not ready:
+            # CPU idle: jump straight to the next arrival
+            clock = arrival_times[order[cursor]]
+            continue
+
+        i = pop()
+        end = clock + burst_times[i]
+        dispatches += 1
+        yield clock, 'dispatch', names[i]
+        while cursor < n and arrival_times[order[cursor]] < end:
+            j = order[cursor]
+            push(j)
+            yield arrival_times[j], 'arrive', names[j]
+            cursor += 1
+        yield end, 'complete', names[i]
+        table.remaining[i] = 0
+        clock = end
+
+
+def _round_robin(table, time_quantum, checkpoints=None, resume=None):
+    # Arrivals are consumed from a pre-sorted cursor and the ready queue is a
+    # deque, so each slice costs O(1) and the run scales with context switches
+    names = table.names
+    arrival_times = table.arrival
+    remaining = table.remaining
+    n = len(table)
+    order = _arrival_order(arrival_times)
+    ready = deque()
+    cursor = 0
+    clock = 0
+    dispatches = 0
+    if resume is not None:
+        clock, cursor, dispatches, entries = resume
+        ready.extend(entries)
+    checkpointed = dispatches
+
+    while cursor < n or ready:
+        if checkpoints is not None and dispatches - checkpointed >= max(CHECKPOINT_INTERVAL, len(ready)):
+            checkpoints.append(_checkpoint(table, clock, cursor, dispatches, ready))
+            checkpointed = dispatches
+        while cursor < n and arrival_times[order[cursor]] <= clock:
+            i = order[cursor]
+            ready.append(i)
+            yield arrival_times[i], 'arrive', names[i]
+            cursor += 1
+        if not ready:
+            clock = arrival_times[order[cursor]]
+            continue
+
+        i = ready.popleft()
+        dispatches += 1
+        yield clock, 'dispatch', names[i]
+        run = min(time_quantum, remaining[i])
+        if not ready:
+            # Nobody is waiting: keep the CPU for whole quanta until the first
+            # expiry that finds a newcomer in the queue
+            if cursor < n:
+                quanta = (arrival_times[order[cursor]] - clock) // time_quantum + 1
+                run = min(quanta * time_quantum, remaining[i])
+            else:
+                run = remaining[i]
+        end = clock + run
+        # Arrivals during the slice queue up before the preempted process,
+        # arrivals at the expiry instant queue up behind it
+        while cursor < n and arrival_times[order[cursor]] < end:
+            j = order[cursor]
+            ready.append(j)
+            yield arrival_times[j], 'arrive', names[j]
+            cursor += 1
+        remaining[i] -= run
+        clock = end
+
+        if remaining[i]:
+            yield clock, 'preempt', names[i]
+            ready.append(i)
+        else:
+            yield clock, 'complete', names[i]
+
+
+def _preemptive(table, keys=None, checkpoints=None, resume=None):
+    # Preemptive counterpart of the heap branch of _non_preemptive. The heap
+    # holds (key, arrival, i); without keys (SRTF) the key is the remaining
+    # time when the process was queued. Everything queued before the running
+    # process was dispatched lost to it, so after admitting arrivals only the
+    # top of the heap can preempt it, and only with a strictly smaller key.
+    names = table.names
+    arrival_times = table.arrival
+    remaining = table.remaining
+    n = len(table)
+    order = _arrival_order(arrival_times)
+    ready = []
+    push = heapq.heappush
+    cursor = 0
+    clock = 0
+    dispatches = 0
+    if resume is not None:
+        clock, cursor, dispatches, ready = resume
+    checkpointed = dispatches
+
+    while cursor < n or ready:
+        if checkpoints is not None and dispatches - checkpointed >= max(CHECKPOINT_INTERVAL, len(ready)):
+            checkpoints.append(_checkpoint(table, clock, cursor, dispatches, ready))
+            checkpointed = dispatches
+        while cursor < n and arrival_times[order[cursor]] <= clock:
+            i = order[cursor]
+            push(ready, (remaining[i] if keys is None else keys[i], arrival_times[i], i))
+            yield arrival_times[i], 'arrive', names[i]
+            cursor += 1
+        if not ready:
+            clock = arrival_times[order[cursor]]
+            continue
+
+        i = heapq.heappop(ready)[2]
+        dispatches += 1
+        yield clock, 'dispatch', names[i]
+        while True:
+            end = clock + remaining[i]
+            if cursor == n or arrival_times[order[cursor]] >= end:
+                remaining[i] = 0
+                clock = end
+                yield clock, 'complete', names[i]
+                break
+
+            # Run up to the next arrival instant and admit everyone arriving then
+            arrival = arrival_times[order[cursor]]
+            remaining[i] -= arrival - clock
+            clock = arrival
+            while cursor < n and arrival_times[order[cursor]] == arrival:
+                j = order[cursor]
+                push(ready, (remaining[j] if keys is None else keys[j], arrival, j))
+                yield arrival, 'arrive', names[j]
+                cursor += 1
+            key = remaining[i] if keys is None else keys[i]
+            if ready[0][0] < key:
+                yield clock, 'preempt', names[i]
+                push(ready, (key, arrival_times[i], i))
+                break
+
+
+def _mlfq(table, quanta, boost_interval=None, checkpoints=None, resume=None):
+    # Level k is a deque served round robin with quanta[k], and bit k of
+    # mask is set while it is non-empty, so the highest non-empty level is
+    # the lowest set bit. Arrivals enter level 0. A process that has used up
+    # the quantum of its level, over one run or several, drops one level (or
+    # stays on the last); one preempted by an arrival, which can only happen
+    # below level 0, keeps its level and its used time and goes back to the
+    # head of its deque. Every boost_interval time units all processes
+    # return to level 0 with a fresh quantum, see _boost(). Checkpoints list
+    # the waiting processes as (level, name, used time), and resume takes
+    # them as (level, i, used time).
+    names = table.names
+    arrival_times = table.arrival
+    remaining = table.remaining
+    n = len(table)
+    order = _arrival_order(arrival_times)
+    bottom = len(quanta) - 1
+    levels = [deque() for _ in quanta]
+    used = array('q', [0]) * n
+    mask = 0
+    cursor = 0
+    clock = 0
+    dispatches = 0
+    if resume is not None:
+        clock, cursor, dispatches, entries = resume
+        for k, i, spent in entries:
+            levels[k].append(i)
+            used[i] = spent
+            mask |= 1 << k
+    next_boost = (clock // boost_interval + 1) * boost_interval if boost_interval else None
+    checkpointed = dispatches
+
+    while cursor < n or mask:
+        if next_boost is not None and clock >= next_boost:
+            mask = _boost(levels, used, mask)
+            next_boost = (clock // boost_interval + 1) * boost_interval
+        if (checkpoints is not None and dispatches - checkpointed >= CHECKPOINT_INTERVAL
+                and dispatches - checkpointed >= sum(map(len, levels))):
+            entries = [(k, names[i], used[i]) for k, level in enumerate(levels) for i in level]
+            left = [remaining[i] for level in levels for i in level]
+            checkpoints.append((clock, cursor, dispatches, entries, left))
+            checkpointed = dispatches
+        while cursor < n and arrival_times[order[cursor]] <= clock:
+            i = order[cursor]
+            levels[0].append(i)
+            mask |= 1
+            yield arrival_times[i], 'arrive', names[i]
+            cursor += 1
+        if not mask:
+            clock = arrival_times[order[cursor]]
+            continue
+
+        k = (mask & -mask).bit_length() - 1
+        level = levels[k]
+        i = level.popleft()
+        if not level:
+            mask ^= 1 << k
+        dispatches += 1
+        yield clock, 'dispatch', names[i]
+        while True:
+            stop = clock + min(quanta[k] - used[i], remaining[i])
+            if next_boost is not None and next_boost < stop:
+                stop = next_boost
+            if k and cursor < n and arrival_times[order[cursor]] < stop:
+                # An arrival on level 0 preempts a lower level
+                stop = arrival_times[order[cursor]]
+            else:
+                while cursor < n and arrival_times[order[cursor]] < stop:
+                    j = order[cursor]
+                    levels[0].append(j)
+                    mask |= 1
+                    yield arrival_times[j], 'arrive', names[j]
+                    cursor += 1
+            remaining[i] -= stop - clock
+            used[i] += stop - clock
+            clock = stop
+
+            if not remaining[i]:
+                yield clock, 'complete', names[i]
+                break
+            if used[i] == quanta[k]:
+                # Quantum used up: drop a level, to the back of its deque
+                k = min(k + 1, bottom)
+                used[i] = 0
+                yield clock, 'preempt', names[i]
+                levels[k].append(i)
+                mask |= 1 << k
+                break
+            if clock == next_boost:
+                # Boosted while running: keep the CPU on level 0
+                mask = _boost(levels, used, mask)
+                next_boost += boost_interval
+                k = 0
+                used[i] = 0
+                continue
+
+            while cursor < n and arrival_times[order[cursor]] == clock:
+                j = order[cursor]
+                levels[0].append(j)
+                mask |= 1
+                yield clock, 'arrive', names[j]
+                cursor += 1
+            yield clock, 'preempt', names[i]
+            levels[k].appendleft(i)
+            mask |= 1 << k
+            break
+
+
+def _boost(levels, used, mask):
+    # Move every waiting process to level 0 with a fresh quantum, lower
+    # levels queuing behind higher ones; only non-empty levels are visited
+    top = levels[0]
+    rest = mask & ~1
+    while rest:
+        k = (rest & -rest).bit_length() - 1
+        top.extend(levels[k])
+        levels[k].clear()
+        rest &= rest - 1
+    for i in top:
+        used[i] = 0
+    return 1 if top else 0
+
+
+def _multi_cpu(table, cpus, per_cpu, fifo, keys=None, time_quantum=None, preemptive=False):
+    # Discrete-event loop over `cpus` CPUs. Each instant is handled in three
+    # steps: CPU timers (completions and quantum expiries, in CPU order),
+    # then arrivals, then dispatches to idle CPUs, lowest CPU first, and for
+    # preemptive policies preemption of the worst running process. With one
+    # CPU this reproduces the single-CPU generators event for event.
+    #
+    # Ready queues are deques (fifo) or heaps of (key, arrival, i), where a
+    # missing `keys` means the remaining time (SRTF). There is one queue, or
+    # one per CPU with arrivals dealt out in turn; `loaded` keeps the
+    # per-CPU queues in the order they filled up (entries for queues emptied
+    # since are skipped lazily), and an idle CPU with an empty queue steals
+    # the next job of the first loaded one.
+    #
+    # A timer is (time, cpu, token); bumping tokens[cpu] on a preemption
+    # voids the pending timer without searching the heap. `worst` is a max
+    # heap of the running processes for shared preemptive queues: ranked by
+    # completion time for SRTF (the largest remaining time at any instant)
+    # and by key otherwise, with stale entries dropped lazily.
+    names = table.names
+    arrival_times = table.arrival
+    remaining = table.remaining
+    n = len(table)
+    order = _arrival_order(arrival_times)
+    push = heapq.heappush
+    pop = heapq.heappop
+    queues = [deque() if fifo else [] for _ in range(cpus if per_cpu else 1)]
+    loaded = deque()
+    running = [-1] * cpus
+    started = [0] * cpus
+    tokens = [0] * cpus
+    timers = []
+    idle = list(range(cpus))
+    worst = []
+    deal = 0
+    cursor = 0
+
+    def enqueue(q, i):
+        ready = queues[q]
+        if fifo:
+            ready.append(i)
+        else:
+            push(ready, (remaining[i] if keys is None else keys[i], arrival_times[i], i))
+        if per_cpu and len(ready) == 1:
+            loaded.append(q)
+
+    def dequeue(q):
+        ready = queues[q]
+        return ready.popleft() if fifo else pop(ready)[2]
+
+    def dispatch(c, i, clock):
+        running[c] = i
+        started[c] = clock
+        tokens[c] += 1
+        run = remaining[i] if time_quantum is None else min(time_quantum, remaining[i])
+        push(timers, (clock + run, c, tokens[c]))
+        if preemptive and not per_cpu:
+            push(worst, (-(clock + remaining[i] if keys is None else keys[i]), c, tokens[c]))
+
+    def preempts(c, clock):
+        # Whether the top of CPU c's ready queue beats the process running on it
+        ready = queues[c if per_cpu else 0]
+        i = running[c]
+        return ready and ready[0][0] < (remaining[i] - (clock - started[c]) if keys is None else keys[i])
+
+    while cursor < n or timers:
+        clock = arrival_times[order[cursor]] if cursor < n else None
+        if timers and (clock is None or timers[0][0] <= clock):
+            clock = timers[0][0]
+
+        while timers and timers[0][0] == clock:
+            _, c, token = pop(timers)
+            if token != tokens[c]:
+                continue
+            i = running[c]
+            remaining[i] -= clock - started[c]
+            started[c] = clock
+            if not remaining[i]:
+                running[c] = -1
+                push(idle, c)
+                yield clock, 'complete', names[i], c
+            elif queues[c if per_cpu else 0]:
+                running[c] = -1
+                push(idle, c)
+                yield clock, 'preempt', names[i], c
+                enqueue(c if per_cpu else 0, i)
+            else:
+                # Nobody is waiting: keep the CPU for whole quanta until the
+                # first expiry after the next arrival
+                if cursor < n:
+                    quanta = (arrival_times[order[cursor]] - clock) // time_quantum + 1
+                    run = min(quanta * time_quantum, remaining[i])
+                else:
+                    run = remaining[i]
+                push(timers, (clock + run, c, token))
+
+        arrived = []
+        while cursor < n and arrival_times[order[cursor]] == clock:
+            i = order[cursor]
+            cursor += 1
+            q = 0
+            if per_cpu:
+                q = deal
+                deal = (deal + 1) % cpus
+            arrived.append(q)
+            enqueue(q, i)
+            yield clock, 'arrive', names[i], q if per_cpu else None
+
+        while idle:
+            if per_cpu:
+                while loaded and not queues[loaded[0]]:
+                    loaded.popleft()
+                if not loaded:
+                    break
+                c = pop(idle)
+                q = c if queues[c] else loaded[0]
+            elif queues[0]:
+                c = pop(idle)
+                q = 0
+            else:
+                break
+            i = dequeue(q)
+            dispatch(c, i, clock)
+            yield clock, 'dispatch', names[i], c
+
+        if not preemptive or not arrived:
+            continue
+        # Only arrivals can preempt: queued jobs already lost to the running ones
+        for c in (arrived if per_cpu else (None,)):
+            while True:
+                if per_cpu:
+                    if running[c] < 0:
+                        break
+                    target = c
+                else:
+                    while worst and (worst[0][2] != tokens[worst[0][1]] or running[worst[0][1]] < 0):
+                        pop(worst)
+                    if not worst:
+                        break
+                    target = worst[0][1]
+                if not preempts(target, clock):
+                    break
+                i = running[target]
+                remaining[i] -= clock - started[target]
+                yield clock, 'preempt', names[i], target
+                enqueue(c if per_cpu else 0, i)
+                j = dequeue(c if per_cpu else 0)
+                dispatch(target, j, clock)
+                yield clock, 'dispatch', names[j], target
+
+
+def replay(events, processes, burst_times):
+    """Yield the scheduler state at every whole time unit of an event trace.
+
+    The frames are ``Playback.frame()`` dictionaries for times 0, 1, 2, ...
+    up to the last event.
+    """
+    playback = Playback(events, processes, burst_times)
+    for t in range(playback.end_time + 1):
+        playback.seek(t)
+        yield playback.frame()
+
+
+class Playback:
+    """Seekable cursor over an event trace.
+
+    ``seek(t)`` moves the scheduler state to time ``t``: forwards it applies
+    only the events in between, backwards it goes back to the latest
+    keyframe at or before ``t`` and applies the events from there.
+    ``frame()`` then describes the state at that time.
+
+    Keyframes are taken every ``KEYFRAME_INTERVAL`` events the first time
+    the playback gets there. They hold the ready queue but not the remaining
+    bursts; going back to one adds the segments completed since then back
+    onto ``remaining`` instead, so a step backwards costs about as much as
+    a step forwards.
+    """
+
+    def __init__(self, events, processes, burst_times):
+        self.events = events
+        self.burst_times = dict(zip(processes, burst_times))
+        self.end_time = events[-1][0] if events else 0
+        # (event count, ready queue as a tuple, completed segment count,
+        # running, started), with the time of the last event applied by each
+        # in keyframe_times
+        self.keyframes = []
+        self.keyframe_times = []
+        self._next_keyframe = KEYFRAME_INTERVAL
+        self._rewind()
+
+    def _rewind(self):
+        self.time = 0
+        self.remaining = dict(self.burst_times)
+        # Insertion-ordered dict: O(1) removal wherever the dispatched process sits
+        self.queue = {}
+        self.completed = []
+        self.running = None
+        self.started = 0
+        self.k = 0
+
+    def _restore(self, t):
+        # Go back to the latest keyframe that only applied events up to t
+        i = bisect_right(self.keyframe_times, t) - 1
+        if i < 0:
+            self._rewind()
+            return
+        k, queue, count, running, started = self.keyframes[i]
+        remaining = self.remaining
+        completed = self.completed
+        for j in range(count, len(completed)):
+            process, segment_start, segment_end = completed[j]
+            remaining[process] += segment_end - segment_start
+        del completed[count:]
+        self.queue = dict.fromkeys(queue)
+        self.running = running
+        self.started = started
+        self.k = k
+
+    def seek(self, t):
+        """Move to time ``t``, clamped to ``0..end_time``."""
+        t = max(0, min(t, self.end_time))
+        if t < self.time:
+            self._restore(t)
+        events = self.events
+        k = self.k
+        while k < len(events) and events[k][0] <= t:
+            time, kind, process = events[k]
+            if kind == 'arrive':
+                self.queue[process] = None
+            elif kind == 'dispatch':
+                del self.queue[process]
+                self.running = process
+                self.started = time
+            else:
+                self.remaining[process] -= time - self.started
+                self.completed.append([process, self.started, time])
+                self.running = None
+                if kind == 'preempt':
+                    self.queue[process] = None
+            k += 1
+            if k == self._next_keyframe:
+                self.keyframes.append((k, tuple(self.queue), len(self.completed), self.running, self.started))
+                self.keyframe_times.append(time)
+                self._next_keyframe = k + max(KEYFRAME_INTERVAL, len(self.queue) // 4)
+        self.k = k
+        self.time = t
+
+    def frame(self):
+        """Return the state at the current time.
+
+        The dictionary has the ``time``, the ``running`` process (or
+        ``None``), the ready ``queue``, the ``completed`` Gantt segments, the
+        running ``segment`` (``[process, start, time]`` or ``None``) and the
+        ``remaining`` burst of the running process.
+
+        ``queue`` (an insertion-ordered dict of names) and ``completed`` are
+        the playback's own containers rather than copies, so a frame costs
+        the same no matter how long the run is. Read them before seeking
+        again and do not modify them.
+        """
+        frame = {
+            'time': self.time,
+            'running': self.running,
+            'queue': self.queue,
+            'completed': self.completed,
+            'segment': None,
+            'remaining': None,
+        }
+        if self.running:
+            frame['segment'] = [self.running, self.started, self.time]
+            frame['remaining'] = self.remaining[self.running] - (self.time - self.started)
+        return frame
+
+
+def read_workload(path):
+    """Load a workload dictionary from ``path``, or from stdin when it is ``'-'``."""
+    if path == '-':
+        return json.load(sys.stdin)
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def write_output(result, path):
+    """Save a result without its event trace or process table to ``path``, or stdout when it is ``'-'``.
+
+    A path ending in ``.trace`` gets the Gantt segments as a binary
+    ``tracefile`` trace instead of JSON.
+    """
+    if path.endswith('.trace'):
+        write_trace(result['events'], path)
+        return
+    output_data = {key: value for key, value in result.items() if key not in ('events', 'table')}
+    if path == '-':
+        json.dump(output_data, sys.stdout)
+        return
+    with open(path, 'w') as f:
+        json.dump(output_data, f)
@@ -1,22 +1,38 @@
 import pygame
-import time
-import json
+import sys
+from itertools import islice
+from live_view import GanttLayer, TextCache, close, load_font, play
+from scheduler import Playback, simulate, read_workload, write_output
 
-# Read process data from JSON file
-with open('process_data.json', 'r') as f:
-    data = json.load(f)
+# Usage: python <script>.py [input.json|- [output.json|output.trace|- [speed|max]]]
+input_path = sys.argv[1] if len(sys.argv) > 1 else 'process_data.json'
+output_path = sys.argv[2] if len(sys.argv) > 2 else 'output_data.json'
+# Simulated time units per second of playback; 'max' jumps to the end
+speed = sys.argv[3] if len(sys.argv) > 3 else '1'
+speed = float('inf') if speed == 'max' else float(speed)
+
+# Read process data from the JSON file or stdin
+data = read_workload(input_path)
 
 processes = data['processes']
 burst_times = data['burst_times']
 arrival_times = data['arrival_times']
-algorithm = data['algorithm']
+algorithm = data.get('algorithm')
+
+# Compute the whole schedule up front; the window only replays its trace
+# The same view serves the preemptive variant, SRTF
+result = simulate(processes, burst_times, arrival_times, 'SRTF' if algorithm == 'SRTF' else 'SJF')
+
+# Save the output data to a JSON file
+write_output(result, output_path)
 
 pygame.init()
 
 # Set up display
 width, height = 800, 600
 screen = pygame.display.set_mode((width, height))
-pygame.display.set_caption("Scheduling Visualization")
+title = "Scheduling Visualization"
+pygame.display.set_caption(title)
 
 # Define colors
 background_color = (255, 255, 255)
@@ -28,134 +44,60 @@ text_color = (0, 0, 0)
 border_color = (0, 0, 0)
 
 # Define font
-font = pygame.font.Font(None, 28)
+font = load_font(28)
+text = TextCache(font, text_color)
 
-# Function to draw the current time window and processes
-def draw(processing, queue, time_elapsed, process_times):
-    screen.fill(background_color)
-    max_time = max([t[0] + t[1] for t in process_times.values()], default=10)
-    time_window_size = max(max_time, 10)
-    chart_width = width - 100
-    unit_width = chart_width / time_window_size
+# Finished Gantt segments and time markers, scaled to the end of the schedule
+end_time = result['events'][-1][0] if result['events'] else 0
+chart = GanttLayer(width, end_time, text, (gantt_color, border_color, background_color))
+
+# Regions repainted by draw(); the labels are static and drawn once
+processor_rect = pygame.Rect(240, 280, 210, 100)
+processor_area = pygame.Rect(240, 280, 360, 110)
+queue_area = pygame.Rect(100, 430, 140, height - 430)
+visible_queue = (height - 430) // 60 + 1
+clock_area = pygame.Rect(600, 10, width - 600, 60)
+
+screen.fill(background_color)
+screen.blit(text("Processor"), (270, 250))
+screen.blit(text("Ready Queue"), (100, 400))
+pygame.display.flip()
 
+# Function to draw the current time window and processes
+def draw(processing, queue, time_elapsed, completed, segment, remaining_time):
     # Draw Gantt chart
-    chart_start_y = 150
-    chart_height = 50
-    for process, (start, duration) in process_times.items():
-        segment_start = start
-        segment_end = start + duration
-        x_start = int(segment_start * unit_width) + 50
-        x_end = int(segment_end * unit_width) + 50
-        pygame.draw.rect(screen, gantt_color, (x_start, chart_start_y, x_end - x_start, chart_height))
-        pygame.draw.rect(screen, border_color, (x_start, chart_start_y, x_end - x_start, chart_height), 2)
-        text = font.render(process, True, text_color)
-        screen.blit(text, (x_start + 5, chart_start_y - 25))
-
-    # Draw time markers
-    for i in range(time_window_size + 1):
-        x_pos = int(i * unit_width) + 50
-        pygame.draw.line(screen, text_color, (x_pos, chart_start_y + chart_height), (x_pos, chart_start_y + chart_height + 20), 2)
-        num_text = font.render(str(i), True, text_color)
-        screen.blit(num_text, (x_pos - 10, chart_start_y + chart_height + 25))
-
-    # Draw processor label
-    processor_label = font.render("Processor", True, text_color)
-    screen.blit(processor_label, (270, 250))
+    dirty = [chart.draw(screen, completed, segment)]
 
     # Draw processor box
+    screen.fill(background_color, processor_area)
     if processing:
-        pygame.draw.rect(screen, active_color, (240, 280, 210, 100))
-        text = font.render(f'Processing: {processing}', True, text_color)
-        screen.blit(text, (270, 300))
-        
-        remaining_time = burst_times[processes.index(processing)]
-        info_text = font.render(f'Burst Time: {remaining_time}', True, text_color)
-        screen.blit(info_text, (270, 330))
-
-    # Draw ready queue
-    ready_queue_label = font.render("Ready Queue", True, text_color)
-    screen.blit(ready_queue_label, (100, 400))
-    
-    
-    for i, p in enumerate(queue):
+        pygame.draw.rect(screen, active_color, processor_rect)
+        screen.blit(text(f'Processing: {processing}'), (270, 300))
+        screen.blit(text(f'Burst Time: {remaining_time}'), (270, 330))
+    dirty.append(processor_area)
+
+    # Draw ready queue, only the entries that fit on screen
+    screen.fill(background_color, queue_area)
+    for i, p in enumerate(islice(queue, visible_queue)):
         pygame.draw.rect(screen, waiting_color, (100, 430 + i * 60, 100, 50))
-        text = font.render(f'{p}', True, text_color)
-        screen.blit(text, (120, 430 + i * 60 + 10))
+        screen.blit(text(p), (120, 430 + i * 60 + 10))
+    dirty.append(queue_area)
 
     # Draw elapsed time
-    time_text = font.render(f'Time: {time_elapsed}', True, text_color)
-    screen.blit(time_text, (600, 10))
-
-    pygame.display.flip()
-
-# Simulation loop
-running = True
-clock = pygame.time.Clock()
-time_elapsed = 0
-queue = []
-processing = None
-process_times = {}
-processed_arrivals = set()
-
-while running:
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-
-    # Add processes based on arrival time
-    for i in range(len(processes)):
-        if arrival_times[i] == time_elapsed and processes[i] not in processed_arrivals:
-            queue.append(processes[i])
-            processed_arrivals.add(processes[i])
-
-    # Process handling
-    if processing is None and queue:
-        processing = queue.pop(0)
-        process_index = processes.index(processing)
-        process_times[processing] = [time_elapsed, burst_times[process_index]]
-
-    draw(processing, queue, time_elapsed, process_times)
-
-    if processing:
-        burst_time = burst_times[process_index]
-        time.sleep(1)  # Simulates processing for 1 second
-        time_elapsed += 1
-        
-        burst_times[process_index] -= 1
-        
-        if burst_times[process_index] <= 0:
-            processing = None
-
-    clock.tick(1)
-
-    
-    if not processing and not queue and len(process_times) == len(processes):
-        draw(None, queue, time_elapsed, process_times)
-        # time.sleep(3)
-        while running:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    running = False
-turnaround_times = {}
-waiting_times = {}
-
-for process in processes:
-    process_index = processes.index(process)
-    start_time, burst_duration = process_times[process]
-    finish_time = start_time + burst_duration
-    turnaround_times[process] = finish_time - arrival_times[process_index]
-    waiting_times[process] = turnaround_times[process] - burst_duration
-
-# Create output data dictionary
-output_data = {
-    'gantt_chart': [(process, start, start + duration) for process, (start, duration) in process_times.items()],
-    'turnaround_times': turnaround_times,
-    'waiting_times': waiting_times
-}
-
-# Save the output data to a JSON file
-with open('output_data.json', 'w') as f:
-    json.dump(output_data, f)
-
-
-pygame.quit()
+    screen.fill(background_color, clock_area)
+    screen.blit(text(f'Time: {time_elapsed}'), (600, 10))
+    dirty.append(clock_area)
+
+    pygame.display.update(dirty)
+
+# Replay the precomputed trace: space pauses, Left/Right step, Up/Down
+# change the speed, Home/End and PageUp/PageDown seek
+playback = Playback(result['events'], processes, burst_times)
+play(
+    playback,
+    lambda frame: draw(frame['running'], frame['queue'], frame['time'], frame['completed'], frame['segment'], frame['remaining']),
+    title,
+    speed,
+)
+
+close()
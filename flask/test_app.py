@@ -0,0 +1,59 @@
+"""Concurrency test for the Flask app: parallel submissions get their own results."""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from scheduler import simulate
+
+ALGORITHMS = ('FCFS', 'SJF', 'Round Robin', 'SRTF')
+
+
+def make_form(k):
+    # A distinct workload per submission: its own process names, bursts and arrivals
+    n = 3 + k % 5
+    form = {
+        'process': ','.join(f'W{k}P{i}' for i in range(n)),
+        'burst_time': ','.join(str(1 + (k * 7 + i * 3) % 11) for i in range(n)),
+        'arrival_time': ','.join(str((k + i * 2) % 6) for i in range(n)),
+        'algorithm': ALGORITHMS[k % len(ALGORITHMS)],
+    }
+    if form['algorithm'] == 'Round Robin':
+        form['time_quantum'] = str(1 + k % 3)
+    return form
+
+
+def submit_and_wait(app, form, timeout=60):
+    client = app.test_client()
+    response = client.post('/jobs', data=form)
+    assert response.status_code in (200, 202), response.get_json()
+    status = response.get_json()
+    if response.status_code == 202:
+        status['state'] = 'queued'
+    deadline = time.monotonic() + timeout
+    while status['state'] != 'done':
+        assert status['state'] in ('queued', 'running'), status
+        assert time.monotonic() < deadline, status
+        time.sleep(0.02)
+        response = client.get(f"/jobs/{status['id']}")
+        assert response.status_code == 200
+        status = response.get_json()
+    return status['result']
+
+
+def test_parallel_submissions_get_their_own_results(app_module):
+    forms = [make_form(k) for k in range(24)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(partial(submit_and_wait, app_module.app), forms))
+
+    for form, result in zip(forms, results):
+        processes = form['process'].split(',')
+        expected = simulate(
+            processes,
+            list(map(int, form['burst_time'].split(','))),
+            list(map(int, form['arrival_time'].split(','))),
+            form['algorithm'],
+            time_quantum=int(form['time_quantum']) if 'time_quantum' in form else None,
+        )
+        assert [row[0] for row in result['job_details']] == processes
+        assert [row[3] for row in result['job_details']] == [expected['completion_times'][p] for p in processes]
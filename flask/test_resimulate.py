@@ -0,0 +1,91 @@
+"""Resumed runs must schedule an edited workload exactly as a full run does."""
+
+import random
+
+import pytest
+
+import scheduler
+from scheduler import ALGORITHMS, PRIORITY_ALGORITHMS, resimulate, simulate
+
+OPTIONS = {'Round Robin': {'time_quantum': 3}, 'MLFQ': {'quanta': [2, 4, 8], 'boost_interval': 40}}
+
+
+def random_workload(rng, n):
+    names = [f'P{i}' for i in range(n)]
+    return {
+        'processes': names,
+        'burst_times': [rng.randint(1, 9) for _ in names],
+        'arrival_times': [rng.randint(0, 4 * n) for _ in names],
+        'priorities': [rng.randint(0, 4) for _ in names],
+    }
+
+
+def random_edit(rng, workload, serial):
+    # One change to a copy of workload; added processes go last, so the
+    # processes both workloads share keep their order
+    workload = {key: list(values) for key, values in workload.items()}
+    n = len(workload['processes'])
+    kind = rng.choice(('burst', 'arrival', 'priority', 'add', 'remove'))
+    if kind == 'add' or n < 2:
+        workload['processes'].append(f'N{serial}')
+        workload['burst_times'].append(rng.randint(1, 9))
+        workload['arrival_times'].append(rng.randint(0, 4 * n))
+        workload['priorities'].append(rng.randint(0, 4))
+    elif kind == 'remove':
+        i = rng.randrange(n)
+        for values in workload.values():
+            del values[i]
+    else:
+        column = {'burst': 'burst_times', 'arrival': 'arrival_times', 'priority': 'priorities'}[kind]
+        i = rng.randrange(n)
+        workload[column][i] = rng.randint(1, 9) if kind == 'burst' else rng.randint(0, 4 * n)
+    return workload
+
+
+def full_run(workload, algorithm):
+    priorities = workload['priorities'] if algorithm in PRIORITY_ALGORITHMS else None
+    return simulate(workload['processes'], workload['burst_times'], workload['arrival_times'], algorithm,
+                    priorities=priorities, checkpoints=True, **OPTIONS.get(algorithm, {}))
+
+
+def tapped_run(snapshot, workload, algorithm):
+    seen = []
+
+    def tap(events):
+        for event in events:
+            seen.append(event)
+            yield event
+
+    priorities = workload['priorities'] if algorithm in PRIORITY_ALGORITHMS else None
+    result = resimulate(snapshot, workload['processes'], workload['burst_times'], workload['arrival_times'],
+                        priorities=priorities, tap=tap)
+    return result, [event for event in seen if event[1] != 'arrive']
+
+
+@pytest.mark.parametrize('algorithm', ALGORITHMS)
+def test_chained_resumes_match_full_runs(monkeypatch, algorithm):
+    # Checkpoints every other dispatch, so small workloads resume from many points
+    monkeypatch.setattr(scheduler, 'CHECKPOINT_INTERVAL', 2)
+    rng = random.Random(algorithm)
+    resumed = 0
+    for trial in range(10):
+        workload = random_workload(rng, rng.randint(2, 30))
+        snapshot = full_run(workload, algorithm)['snapshot']
+        for step in range(6):
+            workload = random_edit(rng, workload, step)
+            result, tapped = tapped_run(snapshot, workload, algorithm)
+            expected = full_run(workload, algorithm)
+            snapshot = result['snapshot']
+            resumed += result['resumed_at'] > 0
+
+            names = snapshot.names
+            pid, start, end = snapshot.segments()
+            segments = [[names[i], s, e] for i, s, e in zip(pid.tolist(), start.tolist(), end.tolist())]
+            assert segments == expected['gantt_chart'], (trial, step)
+            table = result['table']
+            assert dict(zip(table.names, table.finish.tolist())) == expected['completion_times'], (trial, step)
+            assert table.start.tolist() == expected['table'].start.tolist(), (trial, step)
+            # The tap sees the whole schedule, the carried part included
+            assert tapped == [event for event in expected['events'] if event[1] != 'arrive'], (trial, step)
+            assert [event for event in result['events'] if event[0] < result['resumed_at']] == []
+    assert resumed
@@ -0,0 +1,182 @@
+"""The event-driven policies against unit-tick reference schedulers, and multi-CPU invariants."""
+
+import random
+from collections import deque
+
+import pytest
+
+from scheduler import ALGORITHMS, CPU_QUEUES, PRIORITY_ALGORITHMS, simulate
+
+
+def random_workload(rng):
+    n = rng.randint(1, 12)
+    return {
+        'processes': [f'P{i}' for i in range(n)],
+        'burst_times': [rng.randint(1, 8) for _ in range(n)],
+        'arrival_times': [rng.randint(0, 20) for _ in range(n)],
+        # Few distinct values, so the tie-breaks are exercised
+        'priorities': [rng.randint(0, 3) for _ in range(n)],
+    }
+
+
+def random_options(rng, algorithm):
+    if algorithm == 'Round Robin':
+        return {'time_quantum': rng.randint(1, 4)}
+    if algorithm == 'MLFQ':
+        return {'quanta': [rng.randint(1, 4) for _ in range(rng.randint(1, 3))],
+                'boost_interval': rng.choice((None, rng.randint(3, 15)))}
+    return {}
+
+
+def run(workload, algorithm, **options):
+    priorities = workload['priorities'] if algorithm in PRIORITY_ALGORITHMS else None
+    return simulate(workload['processes'], workload['burst_times'], workload['arrival_times'], algorithm,
+                    priorities=priorities, **options)
+
+
+def timeline(gantt_chart):
+    # The process on the CPU during each time unit of non-overlapping
+    # segments, None while idle
+    end = max((segment[2] for segment in gantt_chart), default=0)
+    ticks = [None] * end
+    for process, start, stop in gantt_chart:
+        for t in range(start, stop):
+            assert ticks[t] is None, (process, t)
+            ticks[t] = process
+    return ticks
+
+
+def reference(workload, algorithm, time_quantum=None, quanta=None, boost_interval=None):
+    """Schedule one time unit at a time and return ``(gantt_chart, finish times)``.
+
+    Processes arriving together are admitted in input order. Heap policies
+    pick the smallest ``(key, arrival, position)``; the preemptive ones only
+    preempt for a strictly smaller key. A segment lasts from a dispatch to
+    the next preemption or completion, so a process that keeps the CPU
+    (Round Robin with nobody waiting, an MLFQ boost) stays in one segment.
+    """
+    names = workload['processes']
+    arrival = workload['arrival_times']
+    burst = workload['burst_times']
+    priority = workload['priorities']
+    n = len(names)
+    remaining = list(burst)
+    finish = {}
+    gantt_chart = []
+    ready = [deque()]
+    if algorithm == 'MLFQ':
+        ready = [deque() for _ in quanta]
+    used = [0] * n
+    running = None
+    level = 0
+
+    def stop(t):
+        gantt_chart[-1][2] = t
+        return None
+
+    def key(i):
+        if algorithm in ('SJF', 'SRTF'):
+            return remaining[i], arrival[i], i
+        return -priority[i], arrival[i], i
+
+    t = 0
+    while len(finish) < n:
+        if algorithm == 'Round Robin' and running is not None and used[running] == time_quantum:
+            # Expiry: only those who arrived during the slice go first
+            used[running] = 0
+            if ready[0]:
+                ready[0].append(running)
+                running = stop(t)
+        if algorithm == 'MLFQ':
+            if running is not None and used[running] == quanta[level]:
+                level = min(level + 1, len(quanta) - 1)
+                used[running] = 0
+                ready[level].append(running)
+                running = stop(t)
+            if boost_interval and t and t % boost_interval == 0:
+                for k in range(1, len(quanta)):
+                    ready[0].extend(ready[k])
+                    ready[k].clear()
+                for i in ready[0]:
+                    used[i] = 0
+                if running is not None:
+                    level = 0
+                    used[running] = 0
+            if running is not None and level and t in arrival:
+                # An arrival preempts a lower level; the process keeps its place and used time
+                ready[level].appendleft(running)
+                running = stop(t)
+
+        ready[0].extend(i for i in range(n) if arrival[i] == t)
+
+        if algorithm in ('SRTF', 'Preemptive Priority') and running is not None and ready[0]:
+            best = min(ready[0], key=key)
+            if key(best) < key(running):
+                ready[0].append(running)
+                running = stop(t)
+        if running is None:
+            if algorithm in ('FCFS', 'Round Robin') and ready[0]:
+                running = ready[0].popleft()
+            elif algorithm == 'MLFQ':
+                level = next((k for k, queue in enumerate(ready) if queue), None)
+                if level is not None:
+                    running = ready[level].popleft()
+            elif ready[0]:
+                running = min(ready[0], key=key)
+                ready[0].remove(running)
+            if running is not None:
+                gantt_chart.append([names[running], t, None])
+
+        if running is not None:
+            remaining[running] -= 1
+            used[running] += 1
+            if not remaining[running]:
+                finish[names[running]] = t + 1
+                used[running] = 0
+                running = stop(t + 1)
+        t += 1
+    return gantt_chart, finish
+
+
+@pytest.mark.parametrize('algorithm', ALGORITHMS)
+def test_policies_match_unit_tick_reference(algorithm):
+    rng = random.Random(algorithm)
+    for trial in range(300):
+        workload = random_workload(rng)
+        options = random_options(rng, algorithm)
+        result = run(workload, algorithm, **options)
+        gantt_chart, finish = reference(workload, algorithm, **options)
+        assert result['gantt_chart'] == gantt_chart, (trial, workload, options)
+        assert result['completion_times'] == finish, (trial, workload, options)
+
+
+@pytest.mark.parametrize('queue', CPU_QUEUES)
+@pytest.mark.parametrize('algorithm', [algorithm for algorithm in ALGORITHMS if algorithm != 'MLFQ'])
+def test_multi_cpu_invariants(algorithm, queue):
+    rng = random.Random(f'{algorithm} {queue}')
+    for trial in range(200):
+        workload = random_workload(rng)
+        cpus = rng.randint(2, 4)
+        result = run(workload, algorithm, cpus=cpus, queue=queue, **random_options(rng, algorithm))
+        names = workload['processes']
+        arrival = dict(zip(names, workload['arrival_times']))
+        burst = dict(zip(names, workload['burst_times']))
+        finish = result['completion_times']
+
+        # Every lane is a CPU: its segments do not overlap
+        lanes = [timeline(lane) for lane in result['cpu_lanes']]
+        # Each process gets exactly its burst, after it arrives, one CPU at a time
+        segments = {p: [] for p in names}
+        for process, start, end in result['gantt_chart']:
+            assert arrival[process] <= start < end <= finish[process], (trial, process)
+            segments[process].append([process, start, end])
+        for process, own in segments.items():
+            assert sum(end - start for _, start, end in own) == burst[process], (trial, process)
+            timeline(own)
+
+        if queue == 'shared':
+            # Work conserving: no CPU idles while a process waits
+            for t in range(max(finish.values())):
+                running = {lane[t] for lane in lanes if t < len(lane) and lane[t] is not None}
+                waiting = [p for p in names if arrival[p] <= t < finish[p] and p not in running]
+                assert not waiting or len(running) == cpus, (trial, t, waiting)
@@ -0,0 +1,78 @@
+"""Writing and reading binary schedule traces."""
+
+import io
+
+import pytest
+
+import tracefile
+from scheduler import iter_events, simulate
+from tracefile import TraceWriter, read_trace, write_trace
+
+WORKLOAD = (['A', 'Bé', '進程'], [7, 4, 9], [0, 1, 3])
+
+
+def test_round_trip_keeps_every_segment(tmp_path, monkeypatch):
+    # A small buffer makes the writer flush several times
+    monkeypatch.setattr(tracefile, 'BUFFER_SIZE', 4)
+    expected = simulate(*WORKLOAD, 'Round Robin', time_quantum=2)['gantt_chart']
+    path = tmp_path / 'run.trace'
+    assert write_trace(iter_events(*WORKLOAD, 'Round Robin', time_quantum=2), path) == len(expected)
+
+    trace = read_trace(str(path))
+    assert len(trace) == len(expected)
+    assert trace.gantt_chart() == expected
+    assert trace.names == ['A', 'Bé', '進程']
+    assert trace.start.tolist() == [segment[1] for segment in expected]
+    assert read_trace(path.read_bytes()).gantt_chart() == expected
+
+
+def test_writer_appends_to_an_open_file():
+    buffer = io.BytesIO()
+    buffer.write(b'prefix')
+    with TraceWriter(buffer) as writer:
+        writer.add('A', 0, 3)
+        writer.add('B', 3, 5)
+        writer.add('A', 5, 6)
+    assert not buffer.closed
+    trace = read_trace(buffer.getvalue()[len(b'prefix'):])
+    assert trace.gantt_chart() == [['A', 0, 3], ['B', 3, 5], ['A', 5, 6]]
+    assert trace.pid.tolist() == [0, 1, 0]
+
+
+def test_empty_trace():
+    buffer = io.BytesIO()
+    assert write_trace([], buffer) == 0
+    trace = read_trace(buffer.getvalue())
+    assert len(trace) == 0
+    assert trace.names == []
+
+
+def test_trace_that_was_never_closed_is_rejected():
+    buffer = io.BytesIO()
+    writer = TraceWriter(buffer)
+    writer.add('A', 0, 3)
+    writer.flush()
+    with pytest.raises(ValueError, match=r"^The schedule trace was not closed\.$"):
+        read_trace(buffer.getvalue())
+
+
+def test_truncated_trace_is_rejected():
+    buffer = io.BytesIO()
+    write_trace(iter_events(*WORKLOAD, 'FCFS'), buffer)
+    data = buffer.getvalue()
+    with pytest.raises(ValueError, match="truncated"):
+        read_trace(data[:tracefile.HEADER.size + tracefile.SEGMENT.itemsize])
+
+
+def test_other_files_are_rejected():
+    with pytest.raises(ValueError, match="too short"):
+        read_trace(b'SCHED')
+    with pytest.raises(ValueError, match=r"^Not a schedule trace\.$"):
+        read_trace(b'NOTATRACE' * 8)
+
+
+def test_nul_in_a_name_is_rejected():
+    with TraceWriter(io.BytesIO()) as writer:
+        with pytest.raises(ValueError, match="NUL"):
+            writer.add('A\0B', 0, 1)
+        assert writer.names == []
@@ -0,0 +1,90 @@
+"""Parsing of uploaded CSV and JSONL workload files."""
+
+import io
+
+import pytest
+
+from uploads import parse_upload
+
+
+def parse(text, filename='workload.csv', **options):
+    data = text.encode() if isinstance(text, str) else text
+    return parse_upload(io.BytesIO(data), filename, **options)
+
+
+def as_lists(data):
+    return {key: list(values) for key, values in data.items()}
+
+
+def test_csv_with_and_without_header_agree():
+    expected = {'processes': ['A', 'B'], 'burst_times': [5, 3], 'arrival_times': [0, 2], 'priorities': [1, 4]}
+    assert as_lists(parse("process,burst_time,arrival_time,priority\nA,5,0,1\nB,3,2,4\n")) == expected
+    assert as_lists(parse("A,5,0,1\nB,3,2,4\n")) == expected
+    # After the leading process column a header may order the rest freely,
+    # and priority is optional
+    assert as_lists(parse("process,arrival_time,burst_time\nA,0,5\n\nB,2,3\n")) == {
+        'processes': ['A', 'B'], 'burst_times': [5, 3], 'arrival_times': [0, 2],
+    }
+
+
+def test_jsonl_rows():
+    text = ('{"process": "A", "burst_time": 5, "arrival_time": 0}\n\n'
+            '{"process": "B", "burst_time": "3", "arrival_time": 2}\n')
+    assert as_lists(parse(text, 'workload.jsonl')) == {
+        'processes': ['A', 'B'], 'burst_times': [5, 3], 'arrival_times': [0, 2],
+    }
+
+
+@pytest.mark.parametrize('text, message', [
+    ("A,5,0\nB,x,1\n", "Line 2: burst_time must be an integer."),
+    ("A,5,0\n\nB,0,1\n", "Line 3: burst_time must be a positive integer."),
+    ("A,5,-1\n", "Line 1: arrival_time must not be negative."),
+    ("A,5,0\nB,3\n", "Line 2: expected 3 fields, found 2."),
+    ("process,burst_time,arrival_time\nA,5,0\n,3,1\n", "Line 3: missing process name."),
+    ("process,burst,arrival_time\n", "Line 1: unknown column 'burst'."),
+    ("process,burst_time\n", "Line 1: missing column 'arrival_time'."),
+])
+def test_csv_errors_name_the_line(text, message):
+    with pytest.raises(ValueError) as error:
+        parse(text)
+    assert str(error.value) == message
+
+
+def test_jsonl_errors_name_the_line():
+    with pytest.raises(ValueError, match=r"^Line 2: not valid JSON\.$"):
+        parse('{"process": "A", "burst_time": 1, "arrival_time": 0}\n{oops\n', 'workload.jsonl')
+    with pytest.raises(ValueError, match=r"^Line 1: expected a JSON object\.$"):
+        parse('[1, 2, 3]\n', 'workload.jsonl')
+    with pytest.raises(ValueError, match=r"^Line 1: burst_time must be an integer\.$"):
+        parse('{"process": "A", "burst_time": true, "arrival_time": 0}\n', 'workload.jsonl')
+
+
+def test_priority_must_be_on_every_row_or_none():
+    with pytest.raises(ValueError, match=r"^Line 3: priority must be given on every row or on none\.$"):
+        parse("process,burst_time,arrival_time,priority\nA,5,0,1\nB,3,2,\n")
+    with pytest.raises(ValueError, match=r"^Line 2: priority must be given on every row or on none\.$"):
+        parse('{"process": "A", "burst_time": 5, "arrival_time": 0}\n'
+              '{"process": "B", "burst_time": 3, "arrival_time": 2, "priority": 1}\n', 'workload.jsonl')
+
+
+def test_duplicate_names_are_rejected():
+    with pytest.raises(ValueError, match=r"^Line 3: duplicate process name 'A'\.$"):
+        parse("A,5,0\nB,3,1\n A ,2,2\n")
+
+
+def test_max_rows():
+    text = "".join(f"P{i},1,{i}\n" for i in range(5))
+    assert len(parse(text, max_rows=5)['processes']) == 5
+    with pytest.raises(ValueError, match=r"^Line 6: uploads are limited to 5 processes\.$"):
+        parse(text + "P5,1,5\n", max_rows=5)
+
+
+def test_non_utf8_and_unknown_files_are_rejected():
+    with pytest.raises(ValueError, match=r"^The uploaded file must be UTF-8 text\.$"):
+        parse("A,5,0\nB\xe9,3,1\n".encode('latin-1'))
+    with pytest.raises(ValueError, match=r"^The uploaded file must be UTF-8 text\.$"):
+        parse(b'{"process": "\xff", "burst_time": 1, "arrival_time": 0}\n', 'workload.jsonl')
+    with pytest.raises(ValueError, match=r"^Upload a \.csv or \.jsonl file\.$"):
+        parse("A,5,0\n", 'workload.txt')
+    with pytest.raises(ValueError, match=r"^The uploaded file has no processes\.$"):
+        parse("process,burst_time,arrival_time\n\n")
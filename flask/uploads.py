@@ -0,0 +1,144 @@
+"""Streaming parser for uploaded workload files.
+
+An upload holds one process per line, either as CSV or as JSON Lines:
+
+    process,burst_time,arrival_time,priority      (CSV, header optional)
+    {"process": "P1", "burst_time": 5, "arrival_time": 0, "priority": 2}
+
+The field names are those of the index form; ``priority`` is optional but
+must then be given on every row. The file is read line by line and each
+row is validated and appended straight to integer arrays, so no list of the
+raw lines or fields is ever built. Errors name the offending line.
+"""
+
+import csv
+import io
+import json
+from array import array
+
+FIELDS = ('process', 'burst_time', 'arrival_time', 'priority')
+MAX_ROWS = 1_000_000
+
+
+def parse_upload(stream, filename, max_rows=MAX_ROWS):
+    """Parse a binary ``stream`` holding a CSV or JSONL workload.
+
+    The format is taken from the ``filename`` extension. Returns a workload
+    dictionary like ``parse_workload()`` does, with the numeric columns as
+    ``array('q')``. Raises ``ValueError`` with a line-numbered message.
+    """
+    extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    if extension == 'csv':
+        rows = _csv_rows(io.TextIOWrapper(stream, encoding='utf-8', newline=''))
+    elif extension in ('jsonl', 'ndjson'):
+        rows = _jsonl_rows(io.TextIOWrapper(stream, encoding='utf-8'))
+    else:
+        raise ValueError("Upload a .csv or .jsonl file.")
+
+    builder = _TableBuilder(max_rows)
+    try:
+        for line, row in rows:
+            builder.add(line, row)
+    except UnicodeDecodeError:
+        raise ValueError("The uploaded file must be UTF-8 text.")
+    return builder.workload()
+
+
+def _csv_rows(text):
+    reader = csv.reader(text)
+    columns = None
+    for fields in reader:
+        line = reader.line_num
+        if not fields or not any(field.strip() for field in fields):
+            continue
+        if columns is None:
+            if fields[0].strip().lower() == 'process':
+                columns = [field.strip().lower() for field in fields]
+                unknown = [name for name in columns if name not in FIELDS]
+                if unknown:
+                    raise ValueError(f"Line {line}: unknown column {unknown[0]!r}.")
+                missing = [name for name in FIELDS[:3] if name not in columns]
+                if missing:
+                    raise ValueError(f"Line {line}: missing column {missing[0]!r}.")
+                continue
+            # Without a header the columns are positional, priority optional
+            columns = FIELDS[:max(min(len(fields), 4), 3)]
+        if len(fields) != len(columns):
+            raise ValueError(f"Line {line}: expected {len(columns)} fields, found {len(fields)}.")
+        yield line, dict(zip(columns, fields))
+
+
+def _jsonl_rows(text):
+    for line, raw in enumerate(text, 1):
+        if not raw.strip():
+            continue
+        try:
+            row = json.loads(raw)
+        except ValueError:
+            raise ValueError(f"Line {line}: not valid JSON.")
+        if not isinstance(row, dict):
+            raise ValueError(f"Line {line}: expected a JSON object.")
+        yield line, row
+
+
+class _TableBuilder:
+    # Accumulates validated rows into a name list and parallel int arrays
+
+    def __init__(self, max_rows):
+        self.max_rows = max_rows
+        self.names = []
+        self.seen = set()
+        self.burst_times = array('q')
+        self.arrival_times = array('q')
+        self.priorities = None
+
+    def add(self, line, row):
+        if len(self.names) >= self.max_rows:
+            raise ValueError(f"Line {line}: uploads are limited to {self.max_rows} processes.")
+
+        name = str(row.get('process', '')).strip()
+        if not name:
+            raise ValueError(f"Line {line}: missing process name.")
+        if name in self.seen:
+            raise ValueError(f"Line {line}: duplicate process name {name!r}.")
+        burst = _integer(line, row, 'burst_time')
+        arrival = _integer(line, row, 'arrival_time')
+        if burst <= 0:
+            raise ValueError(f"Line {line}: burst_time must be a positive integer.")
+        if arrival < 0:
+            raise ValueError(f"Line {line}: arrival_time must not be negative.")
+
+        has_priority = row.get('priority') not in (None, '')
+        if not self.names:
+            self.priorities = array('q') if has_priority else None
+        elif has_priority != (self.priorities is not None):
+            raise ValueError(f"Line {line}: priority must be given on every row or on none.")
+        if has_priority:
+            self.priorities.append(_integer(line, row, 'priority'))
+
+        self.names.append(name)
+        self.seen.add(name)
+        self.burst_times.append(burst)
+        self.arrival_times.append(arrival)
+
+    def workload(self):
+        if not self.names:
+            raise ValueError("The uploaded file has no processes.")
+        data = {
+            'processes': self.names,
+            'burst_times': self.burst_times,
+            'arrival_times': self.arrival_times,
+        }
+        if self.priorities is not None:
+            data['priorities'] = self.priorities
+        return data
+
+
+def _integer(line, row, field):
+    value = row.get(field)
+    if isinstance(value, bool):
+        value = None
+    try:
+        return int(value.strip() if isinstance(value, str) else value)
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError(f"Line {line}: {field} must be an integer.")
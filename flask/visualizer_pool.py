@@ -0,0 +1,169 @@
+"""Pre-warmed worker processes for the live pygame views.
+
+A cold view pays for starting Python, importing pygame and the scheduler,
+``pygame.init()`` and loading fonts before its first frame. A
+``VisualizerPool`` keeps ``size`` workers that have already done all of that
+and waits for workloads on a pipe. Each workload runs one of the visualizer
+scripts in the worker, as ``python <script> - - <speed>`` would, with the
+workload on stdin.
+
+Views close themselves ``linger`` seconds after the replay ends and at the
+latest ``timeout`` seconds after they start (see ``live_view``). A worker
+still busy ``grace`` seconds past the timeout is killed and replaced by the
+pool's monitor thread.
+"""
+
+import threading
+import time
+
+from jobs import process_context
+
+# Font sizes the visualizer scripts use, loaded before the first workload
+FONT_SIZES = (28,)
+
+
+def _serve(conn, linger, timeout):
+    """Worker loop: run ``(script, data, speed)`` requests until the pipe closes."""
+    import io
+    import json
+    import os
+    import runpy
+    import sys
+
+    import pygame
+
+    import live_view
+    import scheduler  # noqa: F401 -- imported by every script
+
+    live_view.KEEP_ALIVE = True
+    live_view.LINGER = linger
+    live_view.TIMEOUT = timeout
+    pygame.init()
+    for size in FONT_SIZES:
+        live_view.load_font(size)
+    conn.send('ready')
+
+    devnull = open(os.devnull, 'w')
+    while True:
+        try:
+            script, data, speed = conn.recv()
+        except EOFError:
+            return
+        sys.argv = [script, '-', '-', str(speed)]
+        sys.stdin = io.StringIO(json.dumps(data, default=list))
+        sys.stdout = devnull
+        try:
+            runpy.run_path(script, run_name='__main__')
+        except (Exception, SystemExit) as e:
+            print(f"{script}: {e!r}", file=sys.stderr)
+        finally:
+            # A failed script may leave its window open
+            pygame.display.quit()
+            sys.stdin = sys.__stdin__
+            sys.stdout = sys.__stdout__
+        conn.send('done')
+
+
+class _Worker:
+    def __init__(self, linger, timeout):
+        self.conn, child_conn = process_context.Pipe()
+        self.process = process_context.Process(target=_serve, args=(child_conn, linger, timeout), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.ready = False
+        self.busy_since = None
+
+    def poll(self):
+        """Consume the worker's messages and return False once it has exited."""
+        try:
+            while self.conn.poll():
+                message = self.conn.recv()
+                if message == 'ready':
+                    self.ready = True
+                elif message == 'done':
+                    self.busy_since = None
+        except (EOFError, OSError):
+            return False
+        return self.process.is_alive()
+
+    def stop(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class VisualizerPool:
+    """Keep ``size`` warm visualizer workers and hand them workloads.
+
+    Workers are started by ``start()`` or the first ``show()``; the monitor
+    thread replaces workers that exit or overrun ``timeout`` by ``grace``
+    seconds.
+    """
+
+    def __init__(self, size=2, linger=10, timeout=300, grace=5, poll_interval=0.5):
+        self.size = size
+        self.linger = linger
+        self.timeout = timeout
+        self.grace = grace
+        self.poll_interval = poll_interval
+        self._workers = []
+        self._lock = threading.Lock()
+        self._monitor = None
+
+    def start(self):
+        """Start the workers and the monitor thread, if they are not running yet."""
+        with self._lock:
+            self._fill()
+            if self._monitor is None:
+                self._monitor = threading.Thread(target=self._watch, name='visualizer-pool', daemon=True)
+                self._monitor.start()
+
+    def show(self, script, data, speed=1):
+        """Run the view of ``script`` for ``data`` on an idle warm worker.
+
+        Returns False, without starting anything, when every worker is busy
+        or still warming up; the caller can then start a cold process.
+        """
+        self.start()
+        with self._lock:
+            self._reap()
+            for worker in self._workers:
+                if worker.ready and worker.busy_since is None:
+                    worker.conn.send((script, data, speed))
+                    worker.busy_since = time.monotonic()
+                    return True
+        return False
+
+    def busy(self):
+        """Return the number of workers currently showing a view."""
+        with self._lock:
+            return sum(worker.busy_since is not None for worker in self._workers)
+
+    def close(self):
+        with self._lock:
+            for worker in self._workers:
+                worker.stop()
+            self._workers = []
+
+    def _fill(self):
+        while len(self._workers) < self.size:
+            self._workers.append(_Worker(self.linger, self.timeout))
+
+    def _reap(self):
+        # Replace workers that died or hang past the hard timeout
+        now = time.monotonic()
+        for worker in list(self._workers):
+            alive = worker.poll()
+            overdue = worker.busy_since is not None and now - worker.busy_since > self.timeout + self.grace
+            if not alive or overdue:
+                worker.stop()
+                self._workers.remove(worker)
+        self._fill()
+
+    def _watch(self):
+        while True:
+            time.sleep(self.poll_interval)
+            with self._lock:
+                if not self._workers:
+                    continue
+                self._reap()
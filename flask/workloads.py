@@ -0,0 +1,96 @@
+"""Seedable synthetic workloads for the schedulers.
+
+``generate()`` returns a workload dictionary in the ``process_data.json``
+layout, so its output can be fed to ``simulate()``, the visualizers or the
+Flask form alike. Bursts are drawn from a uniform, exponential or
+heavy-tailed (Pareto) distribution; arrivals follow either a Poisson process
+or an on/off bursty process where jobs arrive in dense clusters separated by
+quiet gaps.
+
+Usage: python workloads.py N [--seed S] [--bursts KIND] [--arrivals KIND] > workload.json
+"""
+
+import argparse
+import json
+import sys
+
+import numpy as np
+
+BURST_DISTRIBUTIONS = ('uniform', 'exponential', 'heavy-tailed')
+ARRIVAL_PATTERNS = ('poisson', 'bursty')
+
+
+def generate(n, seed=None, bursts='uniform', arrivals='poisson', mean_burst=10,
+             load=0.9, max_priority=10, time_quantum=None):
+    """Return a random workload of ``n`` processes.
+
+    ``mean_burst`` sets the average burst for every distribution and ``load``
+    the offered load, i.e. the mean burst divided by the mean gap between
+    arrivals. Priorities are drawn uniformly from ``1..max_priority``; a
+    ``time_quantum`` is copied into the workload when given.
+    """
+    if n < 0:
+        raise ValueError("The number of processes must not be negative.")
+    if bursts not in BURST_DISTRIBUTIONS:
+        raise ValueError(f"Unknown burst distribution: {bursts}")
+    if arrivals not in ARRIVAL_PATTERNS:
+        raise ValueError(f"Unknown arrival pattern: {arrivals}")
+    if mean_burst < 1 or load <= 0:
+        raise ValueError("mean_burst must be at least 1 and load must be positive.")
+
+    rng = np.random.default_rng(seed)
+
+    if bursts == 'uniform':
+        burst_times = rng.integers(1, 2 * mean_burst, size=n, endpoint=True)
+    elif bursts == 'exponential':
+        burst_times = np.ceil(rng.exponential(mean_burst, size=n))
+    else:
+        # Pareto with shape 1.5: finite mean, infinite variance
+        shape = 1.5
+        scale = mean_burst * (shape - 1) / shape
+        burst_times = np.ceil(scale * (1 + rng.pareto(shape, size=n)))
+    burst_times = np.maximum(burst_times, 1).astype(np.int64)
+
+    mean_gap = mean_burst / load
+    if arrivals == 'poisson':
+        gaps = rng.exponential(mean_gap, size=n)
+    else:
+        # On/off process: clusters of about 20 jobs at a tenth of the mean
+        # gap, with the remaining time spent in quiet periods between them
+        cluster = 20
+        gaps = rng.exponential(mean_gap / 10, size=n)
+        starts = rng.random(n) < 1 / cluster
+        gaps[starts] += rng.exponential(mean_gap * cluster * 0.9, size=int(starts.sum()))
+    if n:
+        gaps[0] = 0
+    arrival_times = np.floor(np.cumsum(gaps)).astype(np.int64)
+
+    workload = {
+        'processes': [f'P{i + 1}' for i in range(n)],
+        'burst_times': burst_times.tolist(),
+        'arrival_times': arrival_times.tolist(),
+        'priorities': rng.integers(1, max_priority, size=n, endpoint=True).tolist(),
+    }
+    if time_quantum is not None:
+        workload['time_quantum'] = time_quantum
+    return workload
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a synthetic workload as JSON to stdout.")
+    parser.add_argument('n', type=int, help="number of processes")
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--bursts', choices=BURST_DISTRIBUTIONS, default='uniform')
+    parser.add_argument('--arrivals', choices=ARRIVAL_PATTERNS, default='poisson')
+    parser.add_argument('--mean-burst', type=int, default=10)
+    parser.add_argument('--load', type=float, default=0.9)
+    parser.add_argument('--time-quantum', type=int)
+    args = parser.parse_args(argv)
+
+    workload = generate(args.n, seed=args.seed, bursts=args.bursts, arrivals=args.arrivals,
+                        mean_burst=args.mean_burst, load=args.load, time_quantum=args.time_quantum)
+    json.dump(workload, sys.stdout)
+
+
+if __name__ == '__main__':
+    main()